@@ -1,20 +1,27 @@
 """annotation provider"""
 from __future__ import annotations
 
+import itertools
 import uuid
 from abc import ABC
+from collections import deque
 from collections.abc import Collection
-from itertools import repeat
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 from reprlib import Repr
 from typing import Any
 from typing import Callable
 from typing import Dict
+from typing import Iterable
 from typing import Iterator
 from typing import MutableMapping
 from typing import Optional
 from typing import cast
 
+import numpy as np
 import pandas as pd
+import pyarrow
 from tqdm import tqdm
 
 from pado._compat import cached_property
@@ -24,10 +31,12 @@ from pado.annotations.loaders import AnnotationsFromFileFunc
 from pado.collections import validate_dataframe_index
 from pado.images.ids import GetImageIdFunc
 from pado.images.ids import ImageId
+from pado.images.ids import build_reversed_trie
 from pado.images.ids import match_partial_image_ids_reversed
 from pado.io.files import find_files
 from pado.io.store import Store
 from pado.io.store import StoreType
+from pado.types import OpenFileLike
 from pado.types import UrlpathLike
 
 # === storage =================================================================
@@ -75,6 +84,35 @@ class BaseAnnotationProvider(MutableMapping[ImageId, Annotations], ABC):
 _r = Repr()
 _r.maxdict = 4
 
+# annotation columns with few distinct values are stored as categoricals
+_CATEGORICAL_COLUMNS = ("classification", "color", "style")
+
+
+def _compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """return the dataframe with memory efficient column dtypes"""
+    dtypes: dict[str, Any] = {
+        col: "category"
+        for col in df.columns.intersection(_CATEGORICAL_COLUMNS)
+        if df[col].dtype == object
+    }
+    if dtypes:
+        df = df.astype(dtypes)
+    if "state" in df.columns and df["state"].dtype.kind == "i":
+        df = df.assign(state=pd.to_numeric(df["state"], downcast="integer"))
+    return df
+
+
+def _expand_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """revert _compact_dtypes for dataframes handed out as Annotations"""
+    dtypes: dict[str, Any] = {
+        col: object
+        for col, dtype in df.dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    }
+    if "state" in df.columns and df["state"].dtype.kind == "i":
+        dtypes["state"] = "int64"
+    return df.astype(dtypes) if dtypes else df
+
 
 class AnnotationProvider(BaseAnnotationProvider):
     identifier: str
@@ -96,44 +134,69 @@ class AnnotationProvider(BaseAnnotationProvider):
             if not provider:
                 self._df = pd.DataFrame(columns=AnnotationModel.__fields__)
             else:
-                indices: list[str] = []
-                data: list[dict] = []
+                columns = list(AnnotationModel.__fields__)
+                dfs = []
                 for key, value in provider.items():
                     if value is None:
                         continue
-                    indices.extend(repeat(ImageId.to_str(key), len(value)))
-                    data.extend(a.to_record() for a in value)
-                self._df = pd.DataFrame.from_records(
-                    index=indices,
-                    data=data,
-                    columns=AnnotationModel.__fields__,
-                )
+                    if isinstance(value, Annotations):
+                        df = value.df.reindex(columns=columns)
+                    else:
+                        df = pd.DataFrame.from_records(
+                            [a.to_record() for a in value], columns=columns
+                        )
+                    dfs.append(df.set_axis(pd.Index([ImageId.to_str(key)] * len(df))))
+                if dfs:
+                    self._df = pd.concat(dfs)
+                else:
+                    self._df = pd.DataFrame(columns=columns)
             self.identifier = str(identifier) if identifier else str(uuid.uuid4())
         else:
             raise TypeError(
                 f"expected `BaseAnnotationProvider`, got: {type(provider).__name__!r}"
             )
 
-        self._store: dict[ImageId, Annotations] = {}
+        self._df = _compact_dtypes(self._df)
+        self._store: dict[str, Annotations] = {}  # keyed by ImageId.to_str()
+        self._store_ids: dict[str, ImageId] = {}  # parsed keys of _store
+        self._groups: dict[str, np.ndarray] | None = None
+        self._len_cache: int | None = None
+        self._iter_cache: dict[str, ImageId] | None = None
+        self._iter_snapshot: tuple[int, tuple[ImageId, ...]] | None = None
+        self._df_expanded: pd.DataFrame | None = None
+        self._version = 0  # incremented whenever the image_ids might change
+
+    def _invalidate_cache(self, *, groups: bool = True) -> None:
+        """reset the cached lookup structures"""
+        if groups:
+            self._groups = None
+            self._iter_cache = None
+            self._df_expanded = None
+        self._len_cache = None
+        self._version += 1
+
+    def _get_groups(self) -> dict[str, np.ndarray]:
+        """return the row positions of each image_id in the dataframe"""
+        if self._groups is None:
+            self._groups = self._df.groupby(level=0, sort=False).indices
+        return self._groups
 
     @property
     def df(self) -> pd.DataFrame:
+        # hand out the same dtypes as Annotations.df, independent of _store
+        if self._df_expanded is None:
+            self._df_expanded = _expand_dtypes(self._df)
         if not self._store:
-            return self._df
+            return self._df_expanded
         else:
             # fixme: for now the implementation does the right thing.
             #  but we should try to cache the dataframe based on some
             #  indicator if the Annotations have been modified or not.
-            changed_iids = list(set(self._store))
-            changed_labels = list(map(str, changed_iids))
-            if not changed_iids:
-                dfs = [self._df]
-            else:
-                dfs = [self._df.drop(index=changed_labels, errors="ignore")]
-            for iid in changed_iids:
-                df = self._store[iid].df
-                df = df.set_index(pd.Index([iid.to_str()] * len(df)))
-                dfs.append(df)
+            df = self._df_expanded
+            dfs = [df[~df.index.isin(self._store.keys())]]
+            for key, annos in self._store.items():
+                df = annos.df
+                dfs.append(df.set_axis(pd.Index([key] * len(df))))
             return pd.concat(dfs)
 
     def __getitem__(self, image_id: ImageId) -> Annotations:
@@ -141,14 +204,17 @@ class AnnotationProvider(BaseAnnotationProvider):
             raise TypeError(
                 f"keys must be ImageId instances, got {type(image_id).__name__!r}"
             )
+        key = image_id.to_str()
         try:
-            return self._store[image_id]
+            return self._store[key]
         except KeyError:
-            df = self.df.loc[
-                [image_id.to_str()], :
-            ]  # list: return DataFrame even if length == 1
-            df = df.reset_index(drop=True)
-            a = self._store[image_id] = Annotations(df, image_id=image_id)
+            try:
+                rows = self._get_groups()[key]
+            except KeyError:
+                raise KeyError(image_id) from None
+            df = _expand_dtypes(self._df.take(rows).reset_index(drop=True))
+            a = self._store[key] = Annotations(df, image_id=image_id)
+            self._store_ids[key] = image_id
             return a
 
     def __setitem__(self, image_id: ImageId, v: Annotations) -> None:
@@ -162,35 +228,60 @@ class AnnotationProvider(BaseAnnotationProvider):
             v.image_id = image_id
         elif v.image_id != image_id:
             raise ValueError(f"image_ids don't match: {image_id!r} vs {v.image_id!r}")
-        self._store[image_id] = v
+        key = image_id.to_str()
+        self._store[key] = v
+        self._store_ids[key] = image_id
+        self._invalidate_cache(groups=False)
 
     def __delitem__(self, image_id: ImageId) -> None:
         if not isinstance(image_id, ImageId):
             raise TypeError(
                 f"keys must be ImageId instances, got {type(image_id).__name__!r}"
             )
+        key = image_id.to_str()
         try:
-            del self._store[image_id]
+            del self._store[key]
+            del self._store_ids[key]
         except KeyError:
             had_store = False
         else:
             had_store = True
-        try:
-            self.df.drop(image_id.to_str(), inplace=True)
-        except KeyError:
+        rows = self._get_groups().get(key)
+        if rows is None:
             had_df = False
         else:
             had_df = True
+            mask = np.ones(len(self._df), dtype=bool)
+            mask[rows] = False
+            self._df = self._df[mask]
+        self._invalidate_cache(groups=had_df)
         if not had_store and not had_df:
             raise KeyError(image_id)
 
     def __len__(self) -> int:
-        return self.df.index.nunique()
+        if self._len_cache is None:
+            keys = self._get_groups().keys()
+            self._len_cache = len(keys | self._store.keys())
+        return self._len_cache
+
+    def __contains__(self, image_id: object) -> bool:
+        if not isinstance(image_id, ImageId):
+            return False
+        key = image_id.to_str()
+        return key in self._store or key in self._get_groups()
 
     def __iter__(self) -> Iterator[ImageId]:
-        return iter(
-            set(map(ImageId.from_str, self.df.index.unique())).union(self._store)
-        )
+        # snapshot the image_ids once per version, loading items keeps them
+        snapshot = self._iter_snapshot
+        if snapshot is None or snapshot[0] != self._version:
+            if self._iter_cache is None:
+                keys = self._get_groups().keys()
+                self._iter_cache = dict(zip(keys, map(ImageId.from_str, keys)))
+            df_ids = self._iter_cache
+            store_only = (i for k, i in self._store_ids.items() if k not in df_ids)
+            snapshot = (self._version, (*df_ids.values(), *store_only))
+            self._iter_snapshot = snapshot
+        return iter(snapshot[1])
 
     def __repr__(self):
         _akw = [_r.repr_dict(cast(dict, self), 0)]
@@ -202,27 +293,43 @@ class AnnotationProvider(BaseAnnotationProvider):
         self, urlpath: UrlpathLike, *, storage_options: dict[str, Any] | None = None
     ) -> None:
         store = AnnotationProviderStore()
-        dfs = []
-        for image_id, annos in self.items():
-            df = annos.df
-            df = df.set_index(pd.Index([image_id.to_str()] * len(df)))
-            dfs.append(df)
-        if len(dfs) == 0:
-            self._df = pd.DataFrame(columns=AnnotationModel.__fields__)
-        else:
-            self._df = pd.concat(dfs)
+        if self._store:
+            # merge modified annotations into the dataframe
+            self._df = _compact_dtypes(self.df)
+            self._store.clear()
+            self._store_ids.clear()
+            self._invalidate_cache()
         store.to_urlpath(
-            self.df,
+            self._df,
             urlpath,
             identifier=self.identifier,
             storage_options=storage_options,
         )
-        self._store.clear()
 
     @classmethod
-    def from_parquet(cls, urlpath: UrlpathLike) -> AnnotationProvider:
+    def from_parquet(
+        cls,
+        urlpath: UrlpathLike,
+        *,
+        only_ids: Optional[Iterable[ImageId]] = None,
+    ) -> AnnotationProvider:
+        """load an annotation provider from a parquet file
+
+        Parameters
+        ----------
+        urlpath:
+            location of the stored annotation provider
+        only_ids:
+            if provided, only the annotations of these image_ids are loaded
+        """
         store = AnnotationProviderStore()
-        df, identifier, user_metadata = store.from_urlpath(urlpath)
+        if only_ids is None:
+            filters = None
+        else:
+            # the unnamed provider index is stored as `__index_level_0__`
+            ids = pyarrow.array(map(ImageId.to_str, only_ids), type=pyarrow.string())
+            filters = [("__index_level_0__", "in", ids)]
+        df, identifier, user_metadata = store.from_urlpath(urlpath, filters=filters)
         if {
             store.METADATA_KEY_STORE_TYPE,
             store.METADATA_KEY_STORE_VERSION,
@@ -233,7 +340,7 @@ class AnnotationProvider(BaseAnnotationProvider):
         } != set(user_metadata):
             raise NotImplementedError(f"currently unused {user_metadata!r}")
         inst = cls({}, identifier=identifier)
-        inst._df = df
+        inst._df = _compact_dtypes(df)
         return inst
 
 
@@ -252,6 +359,17 @@ class GroupedAnnotationProvider(AnnotationProvider):
             else:
                 self.providers.append(p)
         self.identifier = "-".join(["grouped", *(p.identifier for p in self.providers)])
+        self._merged: tuple[tuple[int, ...], dict[ImageId, None]] | None = None
+
+    def _get_merged(self) -> dict[ImageId, None]:
+        """return the image_ids of all providers in iteration order"""
+        versions = tuple(p._version for p in self.providers)
+        if self._merged is None or self._merged[0] != versions:
+            d: dict[ImageId, None] = {}
+            for provider in reversed(self.providers):
+                d.update(dict.fromkeys(provider))
+            self._merged = versions, d
+        return self._merged[1]
 
     @cached_property
     def df(self):
@@ -265,6 +383,9 @@ class GroupedAnnotationProvider(AnnotationProvider):
                 pass
         raise KeyError(image_id)
 
+    def __contains__(self, image_id: object) -> bool:
+        return any(image_id in ap for ap in self.providers)
+
     def __setitem__(self, image_id: ImageId, value: Annotations) -> None:
         raise RuntimeError("can't add new item to GroupedImageProvider")
 
@@ -272,13 +393,10 @@ class GroupedAnnotationProvider(AnnotationProvider):
         raise RuntimeError("can't delete from {type(self).__name__}")
 
     def __len__(self) -> int:
-        return len(set().union(*self.providers))
+        return len(self._get_merged())
 
     def __iter__(self) -> Iterator[ImageId]:
-        d = {}
-        for provider in reversed(self.providers):
-            d.update(dict.fromkeys(provider))
-        return iter(d)
+        return iter(self._get_merged())
 
     def __repr__(self):
         return f'{type(self).__name__}({", ".join(map(repr, self.providers))})'
@@ -286,10 +404,30 @@ class GroupedAnnotationProvider(AnnotationProvider):
     def to_parquet(
         self, urlpath: UrlpathLike, *, storage_options: dict[str, Any] | None = None
     ) -> None:
-        super().to_parquet(urlpath, storage_options=storage_options)
+        store = AnnotationProviderStore()
+        # the first provider takes precedence for duplicate image_ids
+        seen: set[str] = set()
+        dfs = []
+        for p in self.providers:
+            df = p.df
+            dfs.append(df[~df.index.isin(seen)])
+            seen.update(df.index.unique())
+        if not dfs:
+            dfs.append(pd.DataFrame(columns=AnnotationModel.__fields__))
+        store.to_urlpath(
+            pd.concat(dfs),
+            urlpath,
+            identifier=self.identifier,
+            storage_options=storage_options,
+        )
 
     @classmethod
-    def from_parquet(cls, urlpath: UrlpathLike) -> AnnotationProvider:
+    def from_parquet(
+        cls,
+        urlpath: UrlpathLike,
+        *,
+        only_ids: Optional[Iterable[ImageId]] = None,
+    ) -> AnnotationProvider:
         raise NotImplementedError(f"unsupported operation for {cls.__name__!r}()")
 
 
@@ -307,19 +445,28 @@ def create_annotation_provider(
     resume: bool = False,
     valid_image_ids: Optional[Collection[ImageId]] = None,
     progress: bool = False,
+    workers: Optional[int] = None,
 ) -> AnnotationProvider:
-    """create an annotation provider from a directory containing annotations"""
+    """create an annotation provider from a directory containing annotations
+
+    If `workers` is provided, the annotation files are loaded concurrently
+    in a thread pool with that many workers.
+    """
     files_and_parts = find_files(search_urlpath, glob=search_glob)
 
+    if valid_image_ids is not None:
+        valid_image_ids = frozenset(valid_image_ids)
+        valid_image_ids_trie = build_reversed_trie(valid_image_ids)
+
     if resume and output_urlpath:
         ap = AnnotationProvider.from_parquet(urlpath=output_urlpath)
     else:
         ap = AnnotationProvider({}, identifier=identifier)
 
-    if progress:
+    if progress and workers is None:
         files_and_parts = tqdm(files_and_parts)
 
-    try:
+    def iter_files() -> Iterator[tuple[ImageId, OpenFileLike]]:
         for fp in files_and_parts:
             image_id = image_id_func(fp.file, fp.parts, ap.identifier)
             if image_id is None:
@@ -328,16 +475,51 @@ def create_annotation_provider(
                 if image_id not in valid_image_ids:
                     # try matching partially
                     image_id = match_partial_image_ids_reversed(
-                        valid_image_ids, image_id
+                        valid_image_ids_trie, image_id
                     )
                     if image_id is None:
                         continue  # skip if image_id not in image_id_filter
             if resume and image_id in ap:
                 continue  # skip if we resume and already have the annotations
-            anno = annotations_func(fp.file)
-            if anno is None:
-                continue  # skip id no annotations are returned
-            ap[image_id] = anno
+            yield image_id, fp.file
+
+    try:
+        if workers is None:
+            for image_id, file in iter_files():
+                anno = annotations_func(file)
+                if anno is None:
+                    continue  # skip id no annotations are returned
+                ap[image_id] = anno
+
+        else:
+            files = iter_files()
+            pending = deque()  # futures in submission order
+            running = set()
+            pbar = tqdm(disable=not progress)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                try:
+                    while True:
+                        # keep a bounded window of submitted futures
+                        size = workers * 4 - len(pending)
+                        for image_id, file in itertools.islice(files, size):
+                            future = executor.submit(annotations_func, file)
+                            pending.append((image_id, future))
+                            running.add(future)
+                        if not pending:
+                            break
+                        done, running = wait(running, return_when=FIRST_COMPLETED)
+                        pbar.update(len(done))
+                        # insert in submission order to match workers=None
+                        while pending and pending[0][1].done():
+                            image_id, future = pending.popleft()
+                            anno = future.result()
+                            if anno is None:
+                                continue  # skip id no annotations are returned
+                            ap[image_id] = anno
+                finally:
+                    for _, future in pending:
+                        future.cancel()
+                    pbar.close()
 
     finally:
         if output_urlpath is not None:
@@ -4,7 +4,6 @@ from __future__ import annotations
 import re
 import sys
 import uuid
-from collections import deque
 from functools import lru_cache
 from itertools import repeat
 from reprlib import Repr
@@ -159,19 +158,16 @@ class PadoItemsView(ItemsView, Generic[K, PI]):
     def __iter__(self) -> Iterator[tuple[K, PI]]:
         iid_from_str = ImageId.from_str
         value_from_obj = self._value_type.from_obj
+        df = self._mapping.df
+        # convert all rows at once instead of building a namedtuple per row
+        records = df.to_dict(orient="records")
         if self._value_transform is None:
-            for row in self._mapping.df.itertuples(index=True, name="ValueAsRow"):
-                # noinspection PyProtectedMember
-                x = row._asdict()
-                i = x.pop("Index")
+            for i, x in zip(df.index, records):
                 yield iid_from_str(i), value_from_obj(x)
         else:
             vt = self._value_transform
             mapping = self._mapping
-            for row in mapping.df.itertuples(index=True, name="ValueAsRow"):
-                # noinspection PyProtectedMember
-                x = row._asdict()
-                i = x.pop("Index")
+            for i, x in zip(df.index, records):
                 yield iid_from_str(i), vt(mapping, value_from_obj(x))
 
 
@@ -611,10 +607,22 @@ def validate_dataframe_index(df: pd.DataFrame, *, unique_index: bool = False) ->
     if not isinstance(df, pd.DataFrame):
         raise TypeError(f"expected pandas.DataFrame, got: {type(df).__name__!r}")
 
-    try:
-        deque(map(ImageId.from_str, df.index), maxlen=0)
-    except (TypeError, ValueError):
-        idx0 = df.index[0]
+    index = df.index
+    if len(index) == 0:
+        valid = True
+    else:
+        # vectorized check of all labels, but only fully parse the first one
+        try:
+            valid = bool(
+                index.str.startswith(ImageId._prefix, na=False).all()
+                and index.str.endswith(ImageId._suffix, na=False).all()
+            )
+            ImageId.from_str(index[0])
+        except (AttributeError, TypeError, ValueError):
+            valid = False
+
+    if not valid:
+        idx0 = index[0]
         if isinstance(idx0, tuple):
             msg = """\
                 Detected dataframe indices of type: tuple
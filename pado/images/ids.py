@@ -36,10 +36,65 @@ if TYPE_CHECKING:
 _PADO_BLOCK_IMAGE_ID_EVAL = None
 
 
+def _fast_parse_image_id_args(body: str) -> tuple[list[str], str | None] | None:
+    """parse the arguments of a repr generated image id string
+
+    Only handles plain quoted parts separated by ", " and an optional
+    trailing site keyword. Returns None if the string needs the full parser.
+    """
+    if "\\" in body or "\n" in body:
+        return None
+    parts = []
+    site = None
+    idx = 0
+    end = len(body)
+    while idx < end:
+        is_site = body.startswith("site=", idx)
+        if is_site:
+            idx += 5
+        if idx >= end:
+            return None
+        quote = body[idx]
+        if quote != "'" and quote != '"':
+            return None
+        stop = body.find(quote, idx + 1)
+        if stop == -1:
+            return None
+        value = body[idx + 1 : stop]
+        idx = stop + 1
+        if is_site:
+            if idx != end:
+                return None
+            site = value
+            break
+        parts.append(value)
+        if idx == end:
+            break
+        if not body.startswith(", ", idx):
+            return None
+        idx += 2
+    if not parts:
+        return None
+    return parts, site
+
+
 def _pado_image_id_from_str(cls: type[ImageId], image_id_str: str):
     """parse an image id string"""
     global _PADO_BLOCK_IMAGE_ID_EVAL
 
+    # fast path for strings as generated by ImageId.to_str()
+    if (
+        cls.__name__ == "ImageId"
+        and image_id_str.startswith(cls._prefix)
+        and image_id_str.endswith(cls._suffix)
+    ):
+        args = _fast_parse_image_id_args(
+            image_id_str[len(cls._prefix) : -len(cls._suffix)]
+        )
+        if args is not None:
+            parts, site = args
+            return cls(*parts, site=site)
+
     if _PADO_BLOCK_IMAGE_ID_EVAL is None:
         from pado.settings import settings
 
@@ -130,6 +185,10 @@ class ImageId:
     __slots__ = (
         "_site",
         "_parts",
+        "_str",
+        "_json",
+        "_hash",
+        "_fs_parts",
     )
 
     # string matching rather than regex for speedup `ImageId('1', '2')`
@@ -146,6 +205,7 @@ class ImageId:
             # noinspection PyPropertyAccess
             self._site = part.site
             self._parts = list(part.parts)
+            self._str = self._json = self._hash = self._fs_parts = None
             return
 
         if any(not isinstance(x, str) for x in parts):
@@ -170,6 +230,7 @@ class ImageId:
 
         self._site = site
         self._parts = list(parts)
+        self._str = self._json = self._hash = self._fs_parts = None
 
     @classmethod
     def make(cls, parts: Iterable[str], site: Optional[str] = None):
@@ -182,17 +243,40 @@ class ImageId:
 
     def __repr__(self):
         """Return a nicely formatted representation string"""
-        site, *parts = self
-        args = [repr(p) for p in parts]
-        if site is not None:
-            args.append(f"site={site!r}")
-        return f"{type(self).__name__}({', '.join(args)})"
+        if self._str is None:
+            name = type(self).__name__
+            parts = self._parts
+            site = self._site
+            # specialized for the most common shapes
+            if len(parts) == 1:
+                if site is None:
+                    self._str = f"{name}({parts[0]!r})"
+                else:
+                    self._str = f"{name}({parts[0]!r}, site={site!r})"
+            elif len(parts) == 2 and site is None:
+                self._str = f"{name}({parts[0]!r}, {parts[1]!r})"
+            else:
+                args = [repr(p) for p in parts]
+                if site is not None:
+                    args.append(f"site={site!r}")
+                self._str = f"{name}({', '.join(args)})"
+        return self._str
 
     # --- pickling ----------------------------------------------------
 
     def __getnewargs_ex__(self):
         return self[1:], {"site": self[0]}
 
+    def __getstate__(self):
+        # note: the cached str, json, hash and fs_parts are not pickled
+        return None, {"_site": self._site, "_parts": self._parts}
+
+    def __setstate__(self, state):
+        _, slots = state
+        self._site = slots["_site"]
+        self._parts = slots["_parts"]
+        self._str = self._json = self._hash = self._fs_parts = None
+
     # --- tuple ducktyping --------------------------------------------
 
     def __iter__(self):
@@ -215,6 +299,7 @@ class ImageId:
         "tuple[str, ...]",
         property(attrgetter("_parts"), doc="return the parts of the image id"),
     )
+
     @property
     def last(self) -> str:
         """return the last part of the image id"""
@@ -250,11 +335,13 @@ class ImageId:
 
     def to_json(self):
         """Serialize the ImageId instance to a json object"""
-        d: SerializedImageId = {"image_id": self.parts}
-        site = self[0]
-        if site is not None:
-            d["site"] = site
-        return orjson_dumps(d, option=OPT_SORT_KEYS).decode()
+        if self._json is None:
+            d: SerializedImageId = {"image_id": self.parts}
+            site = self[0]
+            if site is not None:
+                d["site"] = site
+            self._json = orjson_dumps(d, option=OPT_SORT_KEYS).decode()
+        return self._json
 
     @classmethod
     def from_json(cls, image_id_json: str):
@@ -294,13 +381,17 @@ class ImageId:
     def __hash__(self):
         """carefully handle hashing!
 
-        hashing is just based on the filename as a fallback!
+        hashing is based on the parts only, ignoring the site!
 
         BUT: __eq__ is actually based on the full id in case both
              ids specify a site (which will be the default, but is
              not really while we are still refactoring...)
+             Ids that compare equal always have the same parts, so
+             the site must not be part of the hash.
         """
-        return hash(self[-1:])  # (self.last,)
+        if self._hash is None:
+            self._hash = hash(tuple(self._parts))
+        return self._hash
 
     def __eq__(self, other):
         """carefully handle equality!
@@ -342,16 +433,26 @@ class ImageId:
             )
         return tuple(["site", *id_field_names])
 
-    # noinspection PyPropertyAccess
+    def _get_fs_parts(self) -> Tuple[str, ...]:
+        """return the path parts as provided by the site's mapper"""
+        # note: mappers can't be unregistered, so caching the result is safe
+        if self._fs_parts is None:
+            try:
+                mapper = self.site_mapper[self._site]
+                if type(mapper) is FilenamePartsMapper:
+                    fs_parts = self._parts
+                else:
+                    fs_parts = mapper.fs_parts(self.parts)
+            except KeyError:
+                raise KeyError(
+                    f"site '{self.site}' has no registered ImageProvider instance"
+                )
+            self._fs_parts = tuple(fs_parts)
+        return self._fs_parts
+
     def __fspath__(self) -> str:
         """return the ImageId as a relative path"""
-        try:
-            fs_parts = self.site_mapper[self.site].fs_parts(self.parts)
-        except KeyError:
-            raise KeyError(
-                f"site '{self.site}' has no registered ImageProvider instance"
-            )
-        return op.join(*fs_parts)
+        return op.join(*self._get_fs_parts())
 
     # noinspection PyPropertyAccess
     def to_path(self, *, ignore_site: bool = False) -> PurePath:
@@ -364,13 +465,7 @@ class ImageId:
         """
         if ignore_site:
             return PurePath(*self.parts)
-        try:
-            fs_parts = self.site_mapper[self.site].fs_parts(self.parts)
-        except KeyError:
-            raise KeyError(
-                f"site '{self.site}' has no registered ImageProvider instance"
-            )
-        return PurePath(*fs_parts)
+        return PurePath(*self._get_fs_parts())
 
 
 def _hash_str(string: str, hasher=hashlib.sha256) -> str:
@@ -394,23 +489,25 @@ def image_id_from_parts(
 def image_id_from_parts_without_extension(
     file: OpenFileLike, parts: Tuple[str, ...], identifier: Optional[str]
 ) -> Optional[ImageId]:
-    parts = PurePath(*parts).with_suffix("").parts
-    return ImageId(*parts, site=identifier)
+    *head, last = parts
+    # strip the suffix like PurePath.with_suffix("") without creating a path
+    idx = last.rfind(".")
+    if 0 < idx < len(last) - 1:
+        last = last[:idx]
+    return ImageId(*head, last, site=identifier)
 
 
 def image_id_from_json_file(
     file: OpenFileLike, parts: Tuple[str, ...], identifier: Optional[str]
 ) -> Optional[ImageId]:
-    import json
-
     from pado.io.files import uncompressed
 
     try:
         with uncompressed(file) as f:
-            data = json.load(f)
+            data = orjson_loads(f.read())
         fn = data["scan_name"]
         sd = data["scan_date"]
-    except (json.JSONDecodeError, KeyError):
+    except (JSONDecodeError, KeyError):
         return None
 
     if sd.lower() == "fixme":
@@ -419,36 +516,84 @@ def image_id_from_json_file(
         return ImageId(sd, fn)
 
 
+# keys of a reversed trie: image ids or plain tuples of path parts
+_TrieKey = Any
+
+
+class _ReversedTrieNode:
+    """internal node of a reversed image id trie"""
+
+    __slots__ = ("children", "count", "image_id", "terminal")
+
+    def __init__(self) -> None:
+        self.children: dict[Optional[str], _ReversedTrieNode] = {}
+        self.count = 0  # number of image ids below this node
+        self.image_id: Optional[_TrieKey] = None  # any image id below this node
+        self.terminal: Optional[_TrieKey] = None  # image id ending at this node
+
+    def image_ids(self) -> Set[_TrieKey]:
+        """return all image ids below this node"""
+        ids = set().union(*(c.image_ids() for c in self.children.values()))
+        if self.terminal is not None:
+            ids.add(self.terminal)
+        return ids
+
+
+def build_reversed_trie(ids: Iterable[_TrieKey]) -> _ReversedTrieNode:
+    """index image_ids by their elements from back to front
+
+    The returned trie can be passed to `match_partial_image_ids_reversed`
+    in place of the ids to speed up repeated matching. Tuples of path parts
+    can be indexed in place of image_ids, too.
+    """
+    root = _ReversedTrieNode()
+    for image_id in set(ids):
+        node = root
+        node.count += 1
+        node.image_id = image_id
+        for item in reversed(tuple(image_id)):
+            child = node.children.get(item)
+            if child is None:
+                child = node.children[item] = _ReversedTrieNode()
+            node = child
+            node.count += 1
+            node.image_id = image_id
+        node.terminal = image_id
+    return root
+
+
 def match_partial_image_ids_reversed(
-    ids: Iterable[ImageId], image_id: ImageId | tuple[str, ...]
-) -> Optional[ImageId]:
+    ids: Iterable[ImageId] | _ReversedTrieNode, image_id: ImageId | tuple[str, ...]
+) -> Optional[_TrieKey]:
     """match image_ids from back to front
 
     returns None if no match
     raises ValueError in case match is ambiguous
 
     """
-    if isinstance(ids, set):
-        match_set = ids
+    if isinstance(ids, _ReversedTrieNode):
+        root = ids
     else:
-        match_set = set(ids)
+        root = build_reversed_trie(ids)
 
-    def match(
-        x: ImageId | tuple[str, ...], s: Set[ImageId], idx: int
-    ) -> Optional[ImageId]:
+    nodes = [root]
+    idx = -1
+    while True:
         try:
-            xi = x[idx]  # raises index error when out of parts to match
+            xi = image_id[idx]  # raises index error when out of parts to match
         except IndexError:
-            raise ValueError(f"ambiguous: {x!r} -> {s!r}")
-        sj = {sx for sx in s if sx[idx] == xi or xi is None}
-        if len(sj) == 1:
-            return sj.pop()
-        elif len(sj) == 0:
-            return None
+            s = set().union(*(n.image_ids() for n in nodes))
+            raise ValueError(f"ambiguous: {image_id!r} -> {s!r}")
+        if xi is None:
+            nodes = [c for n in nodes for c in n.children.values()]
         else:
-            return match(x, sj, idx - 1)
-
-    return match(image_id, match_set, -1)
+            nodes = [n.children[xi] for n in nodes if xi in n.children]
+        count = sum(n.count for n in nodes)
+        if count == 1:
+            return nodes[0].image_id
+        elif count == 0:
+            return None
+        idx -= 1
 
 
 def filter_image_ids(
@@ -471,11 +616,10 @@ def filter_image_ids(
     if isinstance(missing, str):
         missing = FilterMissing(missing)
 
-    # todo: improve speed
-    s = set(ids)
+    trie = build_reversed_trie(ids)
     o = set()
     for t in target:
-        m = match_partial_image_ids_reversed(s, t)
+        m = match_partial_image_ids_reversed(trie, t)
         if m is None:
             if missing == FilterMissing.WARN:
                 warnings.warn(f"no match for: {t}")
@@ -3,14 +3,21 @@ from __future__ import annotations
 
 import json
 import logging
+import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from functools import wraps
+from typing import IO
 from typing import TYPE_CHECKING
 from typing import Any
+from typing import Callable
 from typing import Collection
 from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Tuple
+from typing import TypeVar
 from typing import Union
 
 import tiffslide
@@ -117,6 +124,149 @@ class _SerializedImage(ImageMetadata, FileInfo, PadoInfo):
         extra = Extra.forbid
 
 
+# slide properties stored in dedicated ImageMetadata fields
+_CONSUMED_PROPERTY_KEYS = frozenset(
+    {
+        tiffslide.PROPERTY_NAME_OBJECTIVE_POWER,
+        tiffslide.PROPERTY_NAME_MPP_X,
+        tiffslide.PROPERTY_NAME_MPP_Y,
+        tiffslide.PROPERTY_NAME_VENDOR,
+        tiffslide.PROPERTY_NAME_BACKGROUND_COLOR,
+        tiffslide.PROPERTY_NAME_QUICKHASH1,
+        tiffslide.PROPERTY_NAME_COMMENT,
+        tiffslide.PROPERTY_NAME_BOUNDS_X,
+        tiffslide.PROPERTY_NAME_BOUNDS_Y,
+        tiffslide.PROPERTY_NAME_BOUNDS_WIDTH,
+        tiffslide.PROPERTY_NAME_BOUNDS_HEIGHT,
+    }
+)
+
+_M = TypeVar("_M", bound=BaseModel)
+_T = TypeVar("_T")
+
+
+def _construct_validated(model: type[_M], validated: BaseModel) -> _M:
+    """construct a model from the fields of an already validated model"""
+    return model.construct(
+        **{name: getattr(validated, name) for name in model.__fields__}
+    )
+
+
+def _cached_image_property(func: Callable[[Image], _T]) -> property:
+    """a property that is cached on the Image until the image is closed"""
+    name = func.__name__
+
+    @wraps(func)
+    def getter(self: Image) -> _T:
+        try:
+            return self._cached[name]
+        except KeyError:
+            value = self._cached[name] = func(self)
+            return value
+
+    return property(getter)
+
+
+# --- tile cache ---
+
+
+class _TileCache:
+    """a thread-safe lru cache bounded by the total size of its values"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = int(max_bytes)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Any, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            try:
+                value, _ = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Any, nbytes: int) -> None:
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                return
+            self._data[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_nbytes) = self._data.popitem(last=False)
+                self.current_bytes -= evicted_nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> tuple[int, int]:
+        """return the number of cache hits and misses"""
+        return self.hits, self.misses
+
+
+_PADO_TILE_CACHE: Optional[_TileCache] = None
+_PADO_TILE_CACHE_BYTES: Optional[int] = None
+
+
+def _get_tile_cache() -> Optional[_TileCache]:
+    """return the module tile cache or None if disabled"""
+    global _PADO_TILE_CACHE, _PADO_TILE_CACHE_BYTES
+
+    if _PADO_TILE_CACHE_BYTES is None:
+        from pado.settings import settings
+
+        _PADO_TILE_CACHE_BYTES = settings.tile_cache_bytes
+        if _PADO_TILE_CACHE_BYTES > 0:
+            _PADO_TILE_CACHE = _TileCache(_PADO_TILE_CACHE_BYTES)
+    return _PADO_TILE_CACHE
+
+
+# --- remote block cache ---
+
+_BLOCK_CACHE_PROTOCOLS = frozenset(
+    {"s3", "s3a", "gs", "gcs", "http", "https", "abfs", "az"}
+)
+
+
+def _open_tiffslide(of: Any) -> tuple[TiffSlide, Optional[IO[bytes]]]:
+    """open a TiffSlide, coalescing small remote reads into cached blocks
+
+    returns the slide and the file handle opened for it (or None), which
+    has to be closed by the caller after closing the slide.
+    """
+    from pado.settings import settings
+
+    block_size = settings.image_block_cache_size
+    if block_size > 0:
+        protocol = of.fs.protocol
+        protocols = {protocol} if isinstance(protocol, str) else set(protocol)
+        if not protocols.isdisjoint(_BLOCK_CACHE_PROTOCOLS):
+            fh = of.fs.open(
+                of.path, mode="rb", block_size=block_size, cache_type="blockcache"
+            )
+            try:
+                slide = TiffSlide(
+                    fh, tifffile_options={"name": os.path.basename(of.path)}
+                )
+            except BaseException:
+                fh.close()
+                raise
+            return slide, fh
+    return TiffSlide(of), None
+
+
 class Image:
     """pado.img.Image is a wrapper around whole slide image data"""
 
@@ -125,6 +275,8 @@ class Image:
         "_metadata",
         "_file_info",
         "_slide",
+        "_fh",
+        "_cached",
     )  # prevent attribute errors during refactor
     __fields__: tuple[str, ...] = tuple(_SerializedImage.__fields__)
 
@@ -140,9 +292,11 @@ class Image:
         self.urlpath = urlpath
         self._metadata: Optional[ImageMetadata] = None
         self._file_info: Optional[FileInfo] = None
+        self._cached: Dict[str, Any] = {}
 
         # file handles
         self._slide: Optional[TiffSlide] = None
+        self._fh: Optional[IO[bytes]] = None
 
         # optional load on init
         if load_metadata or load_file_info or checksum:
@@ -156,10 +310,10 @@ class Image:
     def from_obj(cls, obj: Any) -> Image:
         """instantiate an image from an object, i.e. a pd.Series"""
         md = _SerializedImage.parse_obj(obj)
-        # get metadata
-        metadata = ImageMetadata.parse_obj(md)
-        file_info = FileInfo.parse_obj(md)
-        pado_info = PadoInfo.parse_obj(md)
+        # get metadata (fields are validated already, no need to re-parse)
+        metadata = _construct_validated(ImageMetadata, md)
+        file_info = _construct_validated(FileInfo, md)
+        pado_info = _construct_validated(PadoInfo, md)
         # get extra data
         inst = cls(pado_info.urlpath)
         inst._metadata = metadata
@@ -183,13 +337,13 @@ class Image:
             pado_image_backend=TiffSlide.__class__.__qualname__,
             pado_image_backend_version=tiffslide.__version__,
         )
-        return _SerializedImage.parse_obj(
-            {
-                **pado_info.dict(),
-                **self.metadata.dict(),
-                **self.file_info.dict(),
-            }
-        ).dict()
+        record = {
+            **pado_info.dict(),
+            **self.metadata.dict(),
+            **self.file_info.dict(),
+        }
+        # the models are validated already, no need to parse them again
+        return {name: record[name] for name in _SerializedImage.__fields__}
 
     def __enter__(self) -> Image:
         return self.open()
@@ -245,7 +399,7 @@ class Image:
                     f"via not an AbstractFileSystem, got {type(via).__name__}"
                 )
             try:
-                self._slide = TiffSlide(of)
+                self._slide, self._fh = _open_tiffslide(of)
             except Exception as e:
                 _log.error(f"{self.urlpath!r} with error {e!r}")
                 self.close()
@@ -300,6 +454,10 @@ class Image:
         if self._slide:
             self._slide.close()
             self._slide = None
+            self._cached.clear()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
 
     def __repr__(self):
         return f"{type(self).__name__}({self.urlpath!r})"
@@ -330,32 +488,24 @@ class Image:
             props = slide.properties
             dimensions = slide.dimensions
 
-            _used_keys: Dict[str, Any] = {}
-
-            def pget(key):
-                return _used_keys.setdefault(key, props.get(key))
-
             return ImageMetadata(
                 width=dimensions[0],
                 height=dimensions[1],
-                objective_power=pget(tiffslide.PROPERTY_NAME_OBJECTIVE_POWER),
-                mpp_x=pget(tiffslide.PROPERTY_NAME_MPP_X),
-                mpp_y=pget(tiffslide.PROPERTY_NAME_MPP_Y),
+                objective_power=props.get(tiffslide.PROPERTY_NAME_OBJECTIVE_POWER),
+                mpp_x=props.get(tiffslide.PROPERTY_NAME_MPP_X),
+                mpp_y=props.get(tiffslide.PROPERTY_NAME_MPP_Y),
                 downsamples=list(slide.level_downsamples),
-                vendor=pget(tiffslide.PROPERTY_NAME_VENDOR),
-                background_color=pget(tiffslide.PROPERTY_NAME_BACKGROUND_COLOR),
-                quickhash1=pget(tiffslide.PROPERTY_NAME_QUICKHASH1),
-                comment=pget(tiffslide.PROPERTY_NAME_COMMENT),
-                bounds_x=pget(tiffslide.PROPERTY_NAME_BOUNDS_X),
-                bounds_y=pget(tiffslide.PROPERTY_NAME_BOUNDS_Y),
-                bounds_width=pget(tiffslide.PROPERTY_NAME_BOUNDS_WIDTH),
-                bounds_height=pget(tiffslide.PROPERTY_NAME_BOUNDS_HEIGHT),
+                vendor=props.get(tiffslide.PROPERTY_NAME_VENDOR),
+                background_color=props.get(tiffslide.PROPERTY_NAME_BACKGROUND_COLOR),
+                quickhash1=props.get(tiffslide.PROPERTY_NAME_QUICKHASH1),
+                comment=props.get(tiffslide.PROPERTY_NAME_COMMENT),
+                bounds_x=props.get(tiffslide.PROPERTY_NAME_BOUNDS_X),
+                bounds_y=props.get(tiffslide.PROPERTY_NAME_BOUNDS_Y),
+                bounds_width=props.get(tiffslide.PROPERTY_NAME_BOUNDS_WIDTH),
+                bounds_height=props.get(tiffslide.PROPERTY_NAME_BOUNDS_HEIGHT),
                 extra_json=json.dumps(
-                    {
-                        key: value
-                        for key, value in sorted(props.items())
-                        if key not in _used_keys
-                    }
+                    {key: props[key] for key in props.keys() - _CONSUMED_PROPERTY_KEYS},
+                    sort_keys=True,
                 ),
             )
         else:
@@ -420,7 +570,17 @@ class Image:
             raise RuntimeError(f"{self!r} not opened and not in context manager")
         return self._slide.level_count
 
-    @property
+    def _slide_mpp(self) -> MPP | None:
+        """return the mpp directly from the opened slide if available"""
+        props = self._slide.properties
+        mpp_x = props.get(tiffslide.PROPERTY_NAME_MPP_X)
+        mpp_y = props.get(tiffslide.PROPERTY_NAME_MPP_Y)
+        try:
+            return MPP(float(mpp_x), float(mpp_y))
+        except (TypeError, ValueError):
+            return None
+
+    @_cached_image_property
     def level_dimensions(self) -> Dict[int, IntSize]:
         if self._slide is None:
             raise RuntimeError(f"{self!r} not opened and not in context manager")
@@ -432,23 +592,37 @@ class Image:
             for lvl, ((x, y), ds) in enumerate(zip(dims, down))
         }
 
-    @property
+    @_cached_image_property
     def level_mpp(self) -> Dict[int, MPP]:
-        return {
-            lvl: self.mpp.scale(ds) for lvl, ds in enumerate(self.metadata.downsamples)
-        }
+        mpp0 = self.mpp
+        if self._metadata is None and self._slide is not None:
+            # avoid building the metadata model just for the downsamples
+            downsamples = self._slide.level_downsamples
+        else:
+            downsamples = self.metadata.downsamples
+        return {lvl: mpp0.scale(ds) for lvl, ds in enumerate(downsamples)}
 
-    @property
+    @_cached_image_property
     def mpp(self) -> MPP:
+        if self._metadata is None and self._slide is not None:
+            mpp = self._slide_mpp()
+            if mpp is not None:
+                return mpp
         return MPP(self.metadata.mpp_x, self.metadata.mpp_y)
 
-    @property
+    @_cached_image_property
     def dimensions(self) -> IntSize:
-        return IntSize(
-            x=self.metadata.width,
-            y=self.metadata.height,
-            mpp=self.mpp,
-        )
+        if self._metadata is None and self._slide is not None:
+            # tiffslide caches the dimensions, no need to load the metadata
+            x, y = self._slide.dimensions
+        else:
+            x, y = self.metadata.width, self.metadata.height
+        return IntSize(x=x, y=y, mpp=self.mpp)
+
+    @_cached_image_property
+    def _tile_cache_key(self) -> str:
+        """the urlpath string identifying this image in the tile cache"""
+        return urlpathlike_to_string(self.urlpath)
 
     def get_thumbnail(self, size: Union[IntSize, Tuple[int, int]]) -> PIL.Image.Image:
         if self._slide is None:
@@ -461,7 +635,52 @@ class Image:
             raise TypeError(
                 f"expected tuple or IntSize, got {size!r} of cls {type(size).__name__}"
             )
-        return self._slide.get_thumbnail(size=size, use_embedded=True)
+        cache = _get_tile_cache()
+        if cache is None:
+            return self._slide.get_thumbnail(size=size, use_embedded=True)
+
+        key = (self._tile_cache_key, "thumbnail", tuple(size))
+        thumbnail = cache.get(key)
+        if thumbnail is None:
+            thumbnail = self._slide.get_thumbnail(size=size, use_embedded=True)
+            nbytes = thumbnail.width * thumbnail.height * len(thumbnail.getbands())
+            cache.put(key, thumbnail, nbytes)
+        return thumbnail.copy()
+
+    def _check_get_array_args(
+        self, location: IntPoint, region: IntSize, level: int
+    ) -> None:
+        """validate the arguments of get_array and get_array_into"""
+        if self._slide is None:
+            raise RuntimeError(f"{self!r} not opened and not in context manager")
+
+        # location
+        if not isinstance(location, IntPoint):
+            raise TypeError(
+                f"location requires IntPoint, got: {location!r} of {type(location).__name__}"
+            )
+        elif location.mpp is not None and location.mpp != self.mpp:
+            _guess = next(  # improve error for user
+                (idx for idx, mpp in self.level_mpp.items() if mpp == location.mpp),
+                "level-not-in-image",
+            )
+            raise ValueError(f"location not at level 0, got {location!r} at {_guess}")
+
+        # level
+        if not 0 <= level < self._slide.level_count:
+            raise ValueError(f"level error: 0 <= {level} <= {self.level_count}")
+
+        # region (level mpp only computed when the region carries an mpp)
+        if not isinstance(region, IntSize):
+            raise TypeError(
+                f"region requires IntSize, got: {region!r} of {type(region).__name__}"
+            )
+        elif region.mpp is not None and region.mpp != self.level_mpp[level]:
+            _guess = next(  # improve error for user
+                (idx for idx, mpp in self.level_mpp.items() if mpp == region.mpp),
+                "level-not-in-image",
+            )
+            raise ValueError(f"region not at level {level}, got {region!r} at {_guess}")
 
     def get_array(
         self,
@@ -473,49 +692,60 @@ class Image:
     ) -> np.ndarray:
         """return array from a defined level"""
         if runtime_type_checks:
-            if self._slide is None:
-                raise RuntimeError(f"{self!r} not opened and not in context manager")
+            self._check_get_array_args(location, region, level)
 
-            # location
-            if not isinstance(location, IntPoint):
-                raise TypeError(
-                    f"location requires IntPoint, got: {location!r} of {type(location).__name__}"
-                )
-            elif location.mpp is not None and location.mpp != self.mpp:
-                _guess = next(  # improve error for user
-                    (idx for idx, mpp in self.level_mpp.items() if mpp == location.mpp),
-                    "level-not-in-image",
-                )
-                raise ValueError(
-                    f"location not at level 0, got {location!r} at {_guess}"
-                )
+        if self._slide is None:
+            raise RuntimeError(f"{self!r} not opened and not in context manager")
 
-            # level (indirectly)
-            try:
-                level_mpp = self.level_mpp[level]
-            except KeyError:
-                raise ValueError(f"level error: 0 <= {level} <= {self.level_count}")
+        cache = _get_tile_cache()
+        if cache is None:
+            return self._slide.read_region(
+                location.as_tuple(), level, region.as_tuple(), as_array=True
+            )
 
-            # region
-            if not isinstance(region, IntSize):
-                raise TypeError(
-                    f"region requires IntSize, got: {region!r} of {type(region).__name__}"
-                )
-            elif region.mpp is not None and region.mpp != level_mpp:
-                _guess = next(  # improve error for user
-                    (idx for idx, mpp in self.level_mpp.items() if mpp == region.mpp),
-                    "level-not-in-image",
-                )
-                raise ValueError(
-                    f"region not at level {level}, got {region!r} at {_guess}"
-                )
+        key = (
+            self._tile_cache_key,
+            level,
+            location.as_tuple(),
+            region.as_tuple(),
+        )
+        array = cache.get(key)
+        if array is None:
+            array = self._slide.read_region(
+                location.as_tuple(), level, region.as_tuple(), as_array=True
+            )
+            array.flags.writeable = False
+            cache.put(key, array, array.nbytes)
+        return array
+
+    def get_array_into(
+        self,
+        out: np.ndarray,
+        location: IntPoint,
+        region: IntSize,
+        level: int,
+        *,
+        runtime_type_checks: bool = True,
+    ) -> np.ndarray:
+        """read array from a defined level into a preallocated array
+
+        `out` needs to have shape (height, width, samples) and is returned.
+        """
+        if runtime_type_checks:
+            self._check_get_array_args(location, region, level)
 
         if self._slide is None:
             raise RuntimeError(f"{self!r} not opened and not in context manager")
 
-        return self._slide.read_region(
-            location.as_tuple(), level, region.as_tuple(), as_array=True
-        )
+        width, height = region.as_tuple()
+        if out.shape[:2] != (height, width):
+            raise ValueError(
+                f"out requires shape ({height}, {width}, ...), got {out.shape!r}"
+            )
+
+        array = self.get_array(location, region, level, runtime_type_checks=False)
+        out[...] = array
+        return out
 
     def get_array_at_mpp(
         self, location: IntPoint, region: IntSize, target_mpp: MPP
@@ -538,6 +768,12 @@ class Image:
                 f"region.mpp != target_mpp -> {region.mpp!r} != {target_mpp!r}"
             )
 
+        if target_mpp.as_tuple() == self.mpp.as_tuple():
+            # common case: reading at the base resolution without rescaling
+            return self._slide.read_region(
+                location.as_tuple(), 0, region.as_tuple(), as_array=True
+            )
+
         # we find the corresponding location at level0
         lvl0_xy = _scale_xy(
             location,
@@ -546,14 +782,7 @@ class Image:
         )
         region_wh = region.as_tuple()
 
-        for lvl_best, mpp_best in self.level_mpp.items():
-            if target_mpp > mpp_best or target_mpp == mpp_best:
-                break
-        else:
-            raise NotImplementedError(
-                f"requesting a smaller mpp {target_mpp!r} "
-                f"than provided in the image {self.level_mpp.items()!r}"
-            )
+        lvl_best, mpp_best = self._best_level_for_mpp(target_mpp)
 
         if target_mpp == mpp_best:
             # no need to rescale
@@ -575,6 +804,25 @@ class Image:
 
         return array
 
+    def _best_level_for_mpp(self, target_mpp: MPP) -> Tuple[int, MPP]:
+        """return the level to read from for a target mpp"""
+        best_levels = self._cached.setdefault("_best_levels", {})
+        key = (target_mpp.x, target_mpp.y, target_mpp.rtol, target_mpp.atol)
+        try:
+            return best_levels[key]
+        except KeyError:
+            pass
+        for lvl_best, mpp_best in self.level_mpp.items():
+            if target_mpp > mpp_best or target_mpp == mpp_best:
+                break
+        else:
+            raise NotImplementedError(
+                f"requesting a smaller mpp {target_mpp!r} "
+                f"than provided in the image {self.level_mpp.items()!r}"
+            )
+        best_levels[key] = lvl_best, mpp_best
+        return lvl_best, mpp_best
+
     def get_zarr_store(
         self,
         level: int,
@@ -67,6 +67,7 @@ class ImageProviderStore(Store):
 
     METADATA_KEY_PROVIDER_VERSION = "image_provider_version"
     PROVIDER_VERSION = 1
+    ROW_GROUP_SIZE = 4096
 
     def __init__(self, version: int = 1, store_type: StoreType = StoreType.IMAGE):
         if store_type != StoreType.IMAGE:
@@ -143,6 +144,7 @@ class ImageProvider(BaseImageProvider):
                 f"expected `BaseImageProvider`, got: {type(provider).__name__!r}"
             )
 
+        self._image_ids: tuple[pd.Index, list[ImageId]] | None = None
         self.__getitem_cached__ = lru_cache(maxsize=None)(self.__getitem_uncached__)
 
     def __getitem__(self, image_id: ImageId) -> Image:
@@ -179,11 +181,29 @@ class ImageProvider(BaseImageProvider):
         return len(self.df)
 
     def __iter__(self) -> Iterator[ImageId]:
-        return iter(map(ImageId.from_str, self.df.index))
+        index = self.df.index
+        # parse the image ids only once per index instance
+        cached = self._image_ids
+        if cached is None or cached[0] is not index:
+            cached = (index, list(map(ImageId.from_str, index)))
+            self._image_ids = cached
+        return iter(cached[1])
 
     def items(self) -> PadoItemsView[ImageId, Image]:
         return PadoItemsView(self, value_type=Image)
 
+    def urlpaths(self) -> np.ndarray:
+        """return the urlpaths of all images in order of the provider's df"""
+        return self.df["urlpath"].to_numpy()
+
+    def dimensions(self) -> np.ndarray:
+        """return a (N, 2) array of all image widths and heights"""
+        return self.df[["width", "height"]].to_numpy(dtype=np.int64)
+
+    def mpps(self) -> np.ndarray:
+        """return a (N, 2) array of all image mpp_x and mpp_y values"""
+        return self.df[["mpp_x", "mpp_y"]].to_numpy(dtype=np.float64)
+
     def __repr__(self):
         _akw = [_r.repr_dict(cast(dict, self), 0)]
         if self.identifier is not None:
@@ -217,6 +237,7 @@ class ImageProvider(BaseImageProvider):
         inst = cls.__new__(cls)
         inst.df = df
         inst.identifier = identifier
+        inst._image_ids = None
         inst.__getitem_cached__ = lru_cache(maxsize=None)(inst.__getitem_uncached__)
         return inst
 
@@ -234,6 +255,20 @@ class GroupedImageProvider(ImageProvider):
             else:
                 self.providers.append(p)
         self.identifier = "-".join(["grouped", *(p.identifier for p in self.providers)])
+        self._merged: tuple[tuple[pd.Index, ...], dict[ImageId, None]] | None = None
+
+    def _get_merged(self) -> dict[ImageId, None]:
+        """return the image_ids of all providers in iteration order"""
+        # a provider's index is replaced whenever images are added or removed
+        indexes = tuple(p.df.index for p in self.providers)
+        if self._merged is None or any(
+            a is not b for a, b in zip(self._merged[0], indexes)
+        ):
+            d: dict[ImageId, None] = {}
+            for provider in reversed(self.providers):
+                d.update(dict.fromkeys(provider))
+            self._merged = indexes, d
+        return self._merged[1]
 
     @cached_property
     def df(self):
@@ -258,13 +293,10 @@ class GroupedImageProvider(ImageProvider):
         raise RuntimeError("can't delete from GroupedImageProvider")
 
     def __len__(self) -> int:
-        return len(set().union(*self.providers))
+        return len(self._get_merged())
 
     def __iter__(self) -> Iterator[ImageId]:
-        d = {}
-        for provider in reversed(self.providers):
-            d.update(dict.fromkeys(provider))
-        return iter(d)
+        return iter(self._get_merged())
 
     def items(self) -> PadoItemsView[ImageId, Image]:
         return super().items()
@@ -290,12 +322,15 @@ class FilteredImageProvider(ImageProvider):
         valid_keys: Optional[Iterable[ImageId]] = None,
     ):
         super().__init__()
+        del self.df  # drop the empty df set in __init__, use the filtered df
+        self._image_ids = None
         self._provider = ImageProvider(provider)
         self._vk = set(self._provider) if valid_keys is None else set(valid_keys)
 
     @cached_property
     def df(self):
-        return self._provider.df.filter(items=self._vk, axis="index")
+        df = self._provider.df
+        return df.loc[df.index.isin([iid.to_str() for iid in self._vk])]
 
     @property
     def valid_keys(self) -> Set[ImageId]:
@@ -315,9 +350,6 @@ class FilteredImageProvider(ImageProvider):
     def __len__(self) -> int:
         return len(self.valid_keys.intersection(self._provider))
 
-    def __iter__(self) -> Iterator[ImageId]:
-        return iter(map(ImageId.from_str, self.df.index))  # fixme
-
     def items(self) -> PadoItemsView[ImageId, Image]:
         return super().items()
 
@@ -337,7 +369,9 @@ class FilteredImageProvider(ImageProvider):
 class LocallyCachedImageProvider(ImageProvider):
     """image provider that prepends a fsspec CachingFileSystem
 
-    use to route a normal ImageProvider through a local cache
+    use to route a normal ImageProvider through a local cache. By default
+    fsspec caches to a temporary directory; to reuse cached files across
+    sessions, pass `cache_storage=pado_cache_path("images")`.
     """
 
     def __init__(
@@ -355,6 +389,9 @@ class LocallyCachedImageProvider(ImageProvider):
     def _prepend_cache(self, urlpath: UrlpathLike) -> UrlpathLike:
         """prepend the cache to the urlpath"""
         fs, path = urlpathlike_to_fs_and_path(urlpath)
+        if isinstance(fs, CachingFileSystem):
+            # images are cached by the provider, don't prepend the cache twice
+            return urlpath
         cached_fs = self._cache_cls(**self._cache_kw, fs=fs)
         return OpenFile(fs=cached_fs, path=path)
 
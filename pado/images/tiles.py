@@ -5,6 +5,9 @@ import inspect
 import json
 import math
 import warnings
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from itertools import islice
 from typing import TYPE_CHECKING
 from typing import Any
@@ -27,6 +30,8 @@ from pado.images.utils import Bounds
 from pado.images.utils import Geometry
 from pado.images.utils import IntPoint
 from pado.images.utils import IntSize
+from pado.images.utils import Point
+from pado.images.utils import Size
 from pado.images.utils import ensure_type
 from pado.images.utils import match_mpp
 
@@ -174,6 +179,19 @@ class TileIndex(Sequence[ReadTileTuple]):
     def __len__(self) -> int:
         raise NotImplementedError
 
+    def bounds_at_mpp(self, mpp: MPP) -> NDArray[np.float64]:
+        """return the x0, y0, x1, y1 bounds of all tiles at mpp as a (N, 4) array"""
+        mpp = ensure_type(mpp, MPP)
+        bounds = np.empty((len(self), 4), dtype=np.float64)
+        for i in range(len(self)):
+            location, size, tile_mpp = self._getitem(i)
+            x0, y0 = location.as_tuple()
+            w, h = size.as_tuple()
+            rx = tile_mpp.x / mpp.x
+            ry = tile_mpp.y / mpp.y
+            bounds[i] = x0 * rx, y0 * ry, (x0 + w) * rx, (y0 + h) * ry
+        return bounds
+
     def to_json(self, *, as_string: bool = False) -> str | dict:
         _module = inspect.getmodule(self)
         if not _module:
@@ -263,9 +281,17 @@ class GridTileIndex(TileIndex):
         overlap: int,
         target_mpp: MPP,
         mask: NDArray[np.bool_] | None = None,
+        order: str = "rowmajor",
     ):
-        if mask is None:
+        if order not in {"rowmajor", "zorder"}:
+            raise ValueError(f"order must be 'rowmajor' or 'zorder', got {order!r}")
+
+        if mask is None and order == "rowmajor":
             masked_indices = None
+        elif mask is None:
+            image_size, tile_size = cls._scale_size(image_size, tile_size, target_mpp)
+            num_x, num_y = cls._get_size(image_size, tile_size, overlap)
+            masked_indices = np.argwhere(np.ones((num_y, num_x), dtype=bool))
         else:
             import cv2
 
@@ -279,6 +305,9 @@ class GridTileIndex(TileIndex):
                 mask.astype(np.uint8), size, interpolation=cv2.INTER_NEAREST
             ).astype(bool)
             masked_indices = np.argwhere(_mask)
+        if order == "zorder":
+            # neighboring tiles are read close in time to improve cache hits
+            masked_indices = masked_indices[_zorder_argsort(masked_indices)]
         return cls(
             image_size=image_size,
             tile_size=tile_size,
@@ -315,6 +344,33 @@ class GridTileIndex(TileIndex):
             self._target_mpp,
         )
 
+    def bounds_at_mpp(self, mpp: MPP) -> NDArray[np.float64]:
+        """return the x0, y0, x1, y1 bounds of all tiles at mpp as a (N, 4) array"""
+        mpp = ensure_type(mpp, MPP)
+        tw, th = self._tile_size.as_tuple()
+        dx = tw - self._overlap
+        dy = th - self._overlap
+        if self._masked_indices is None:
+            num_x, num_y = self._get_size(
+                self._image_size, self._tile_size, self._overlap
+            )
+            idx = np.arange(num_x * num_y, dtype=np.int64)
+            y, x = np.divmod(idx, num_x)
+        else:
+            y = self._masked_indices[:, 0]
+            x = self._masked_indices[:, 1]
+
+        bounds = np.empty((len(x), 4), dtype=np.float64)
+        bounds[:, 0] = x * dx
+        bounds[:, 1] = y * dy
+        bounds[:, 2] = bounds[:, 0] + tw
+        bounds[:, 3] = bounds[:, 1] + th
+        if mpp != self._target_mpp:
+            rx = self._target_mpp.x / mpp.x
+            ry = self._target_mpp.y / mpp.y
+            bounds *= np.array([rx, ry, rx, ry])
+        return bounds
+
     @staticmethod
     def _get_size(
         image_size: IntSize, tile_size: IntSize, overlap: int
@@ -352,6 +408,23 @@ class GridTileIndex(TileIndex):
             return num_x * num_y
 
 
+def _spread_bits(v: NDArray[np.int64]) -> NDArray[np.uint64]:
+    """interleave the lower 32 bits of v with zeros"""
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+
+def _zorder_argsort(yx: NDArray[np.int64]) -> NDArray[np.int64]:
+    """return the indices sorting (y, x) grid positions along a z-order curve"""
+    codes = _spread_bits(yx[:, 1]) | (_spread_bits(yx[:, 0]) << np.uint64(1))
+    return np.argsort(codes, kind="stable")
+
+
 class FastGridTiling(TilingStrategy):
     name = "fastgrid"
 
@@ -363,6 +436,7 @@ class FastGridTiling(TilingStrategy):
         overlap: int = 0,
         min_chunk_size: float | int | None,
         normalize_chunk_sizes: bool,
+        tile_order: str = "rowmajor",
     ) -> None:
         if isinstance(target_mpp, float):
             self._target_mpp = MPP.from_float(target_mpp)
@@ -383,6 +457,11 @@ class FastGridTiling(TilingStrategy):
         self._overlap = int(overlap)
         self._min_chunk_size = min_chunk_size
         self._normalize_chunk_size = normalize_chunk_sizes
+        if tile_order not in {"rowmajor", "zorder"}:
+            raise ValueError(
+                f"tile_order must be 'rowmajor' or 'zorder', got {tile_order!r}"
+            )
+        self._tile_order = tile_order
 
     def precompute(
         self,
@@ -422,9 +501,14 @@ class FastGridTiling(TilingStrategy):
             overlap=self._overlap,
             target_mpp=target_mpp,
             mask=mask,
+            order=self._tile_order,
         )
 
     def serialize(self) -> str:
+        kw: dict[str, Any] = {}
+        if self._tile_order != "rowmajor":
+            # only included when set to keep existing serializations stable
+            kw["tile_order"] = self._tile_order
         return self.serialize_strategy_and_options(
             type(self),
             tile_size=(self._tile_size.x, self._tile_size.y),
@@ -432,6 +516,7 @@ class FastGridTiling(TilingStrategy):
             overlap=self._overlap,
             min_chunk_size=self._min_chunk_size,
             normalize_chunk_size=self._normalize_chunk_size,
+            **kw,
         )
 
 
@@ -461,10 +546,18 @@ class _DeprecatedTile:
         self.data: Optional[np.ndarray] = data
         self.parent: Optional[Image] = parent
 
-        # compute quantities at level0. This is useful when, for instance, visualizing objects on original svs
-        self.level0_bounds = bounds.scale(mpp=self.level0_mpp)
-        self.level0_tile_size = self.size.scale(mpp=self.level0_mpp)
-        self.level0_x0y0 = self.x0y0.scale(mpp=self.level0_mpp)
+    # quantities at level0. This is useful when, for instance, visualizing objects on original svs
+    @cached_property
+    def level0_bounds(self) -> Bounds:
+        return self.bounds.scale(mpp=self.level0_mpp)
+
+    @cached_property
+    def level0_tile_size(self) -> Size:
+        return self.size.scale(mpp=self.level0_mpp)
+
+    @cached_property
+    def level0_x0y0(self) -> Point:
+        return self.x0y0.scale(mpp=self.level0_mpp)
 
     @cached_property
     def size(self) -> IntSize:
@@ -499,6 +592,7 @@ class _DeprecatedTileIterator:
         *,
         size: IntSize,
         level: int,
+        prefetch: int = 4,
     ):
         """create a tile iterator instance"""
         if not isinstance(image, Image):
@@ -516,6 +610,7 @@ class _DeprecatedTileIterator:
         self.image: Image = image
         self.size: IntSize = size
         self.level: int = int(level)
+        self.prefetch: int = max(int(prefetch), 0)
 
         with self.image:
             self.level0_mpp_xy = self.image.level_mpp[0]
@@ -530,34 +625,57 @@ class _DeprecatedTileIterator:
         img = self.image
 
         # todo: incomplete tiles at borders are currently discarded
-        x, y = np.mgrid[
-            0 : img_lvl.width - tile_size.width + 1 : tile_size.width,
-            0 : img_lvl.height - tile_size.height + 1 : tile_size.height,
-        ]
+        xs = np.arange(0, img_lvl.width - tile_size.width + 1, tile_size.width)
+        ys = np.arange(0, img_lvl.height - tile_size.height + 1, tile_size.height)
+        x, y = np.meshgrid(xs, ys, indexing="ij")
 
         # todo: check if this ordering makes sense? maybe depend on chunk order in zarr
-        bounds = np.hstack(
-            (
-                x.reshape(-1, 1),
-                x.reshape(-1, 1) + tile_size.width,
-                y.reshape(-1, 1),
-                y.reshape(-1, 1) + tile_size.height,
-            )
-        )
+        bounds = np.empty((x.size, 4), dtype=np.int64)
+        bounds[:, 0] = x.ravel()
+        bounds[:, 1] = bounds[:, 0] + tile_size.width
+        bounds[:, 2] = y.ravel()
+        bounds[:, 3] = bounds[:, 2] + tile_size.height
+
+        # iterate python ints instead of boxing numpy scalars per element
+        bounds_list = bounds.tolist()
 
         mpp_xy = self.image.level_mpp[self.level]
         store = self.image.get_zarr_store(self.level)
 
+        prefetch = self.prefetch
+
+        def _tile(b, data):
+            return _DeprecatedTile(
+                mpp=mpp_xy,
+                lvl0_mpp=self.level0_mpp_xy,
+                bounds=Bounds.from_tuple(tuple(b), mpp=mpp_xy),
+                data=data,
+                parent=img,
+            )
+
         def _yield_tiles(s):
             with s:
                 z_array = zarr.open_array(s, mode="r")
-                for x0, x1, y0, y1 in bounds:
-                    yield _DeprecatedTile(
-                        mpp=mpp_xy,
-                        lvl0_mpp=self.level0_mpp_xy,
-                        bounds=Bounds.from_tuple((x0, x1, y0, y1), mpp=mpp_xy),
-                        data=z_array[y0:y1, x0:x1],
-                        parent=img,
-                    )
+
+                def _read(b):
+                    x0, x1, y0, y1 = b
+                    return z_array[y0:y1, x0:x1]
+
+                if prefetch == 0:
+                    for b in bounds_list:
+                        yield _tile(b, _read(b))
+                    return
+
+                # read ahead to overlap the latency of remote chunk requests
+                with ThreadPoolExecutor(max_workers=prefetch) as executor:
+                    pending: deque[tuple[Any, Future[np.ndarray]]] = deque()
+                    for b in bounds_list:
+                        pending.append((b, executor.submit(_read, b)))
+                        if len(pending) > prefetch:
+                            b_done, future = pending.popleft()
+                            yield _tile(b_done, future.result())
+                    while pending:
+                        b_done, future = pending.popleft()
+                        yield _tile(b_done, future.result())
 
         yield from _yield_tiles(store)
@@ -5,14 +5,20 @@ import enum
 import hashlib
 import itertools
 import json
+import os
+import sqlite3
 import sys
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from importlib import import_module
 from typing import IO
 from typing import Any
 from typing import BinaryIO
+from typing import Callable
 from typing import Container
+from typing import Iterator
 from typing import NamedTuple
+from typing import Tuple
 from typing import overload
 
 if sys.version_info >= (3, 8):
@@ -21,6 +27,8 @@ else:
     from typing_extensions import Literal
 
 from pado.io.files import urlpathlike_to_fs_and_path
+from pado.settings import pado_cache_path
+from pado.settings import settings
 from pado.types import UrlpathLike
 
 __all__ = [
@@ -102,6 +110,38 @@ def _get_md5(x: bytes):
     return hashlib.md5(x)  # nosec B303
 
 
+def _chunk_reader(
+    f: IO[bytes], chunk_size: int, num_buffers: int = 1
+) -> Callable[[int], bytes | memoryview]:
+    """return a function reading the next chunk into buffer `i`
+
+    uses preallocated buffers via `readinto` when the file supports it, so
+    the returned chunk is only valid until the same buffer is read into again.
+    """
+    readinto = getattr(f, "readinto", None)
+    if readinto is None:
+        return lambda i: f.read(chunk_size)
+
+    buffers = [memoryview(bytearray(chunk_size)) for _ in range(num_buffers)]
+
+    def read_chunk(i: int) -> memoryview:
+        buf = buffers[i]
+        n = readinto(buf)
+        return buf[: n or 0]
+
+    return read_chunk
+
+
+def _iter_chunks(f: IO[bytes], chunk_size: int) -> Iterator[bytes | memoryview]:
+    """iterate over the chunks of a file reusing a single buffer"""
+    read_chunk = _chunk_reader(f, chunk_size)
+    while True:
+        data = read_chunk(0)
+        if not data:
+            break
+        yield data
+
+
 def checksum_multiple(
     f: IO[bytes], *, algorithms: Container[Algorithm], chunk_size: int
 ) -> tuple[Checksum, ...]:
@@ -127,10 +167,20 @@ def checksum_multiple(
 
     ms = list(build.values())
     length = 0
-    for data in iter(lambda: f.read(chunk_size), b""):
-        length += len(data)
-        for m in ms:
-            m.update(data)
+    read_chunk = _chunk_reader(f, chunk_size, num_buffers=2)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # read the next chunk while the current one is being hashed
+        idx = 0
+        next_data = executor.submit(read_chunk, idx)
+        while True:
+            data = next_data.result()
+            if not data:
+                break
+            idx ^= 1
+            next_data = executor.submit(read_chunk, idx)
+            length += len(data)
+            for m in ms:
+                m.update(data)
 
     return tuple(
         (Checksum(key, length, ensure_str(m.hexdigest())) for key, m in build.items())
@@ -140,7 +190,7 @@ def checksum_multiple(
 def checksum_md5(f: BinaryIO, *, chunk_size: int = 10 * 1024 * 1024) -> str:
     """return the md5sum"""
     m = _get_md5(b"")
-    for data in iter(lambda: f.read(chunk_size), b""):
+    for data in _iter_chunks(f, chunk_size):
         m.update(data)
     return m.hexdigest()
 
@@ -151,8 +201,9 @@ class _AWSETagChecksum:
         self._block_size = int(block_size)
         self._queue: deque[bytes] = deque()
 
-    def update(self, data: bytes):
-        self._queue.append(data)
+    def update(self, data: bytes | memoryview):
+        # data might be a view into a reused buffer
+        self._queue.append(bytes(data))
         self._digest_block()
 
     def _digest_block(self, final: bool = False) -> None:
@@ -317,6 +368,84 @@ def get_precomputed_checksums(
     return tuple(_checksums)
 
 
+_StatKey = Tuple[str, int, int, int]
+
+
+def _local_stat_key(fs: Any, path: str) -> _StatKey | None:
+    """return a cache key for a local file that changes with the file"""
+    if not getattr(fs, "local_file", False):
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(path), st.st_size, st.st_mtime_ns, st.st_ctime_ns
+
+
+def _checksum_cache_connect() -> sqlite3.Connection:
+    """connect to the checksum cache database"""
+    db = pado_cache_path("checksums", ensure_dir=True).joinpath("index.sqlite")
+    con = sqlite3.connect(os.fspath(db), timeout=30)
+    try:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS checksums ("
+            "path TEXT, size INTEGER, mtime_ns INTEGER, ctime_ns INTEGER, "
+            "algorithm TEXT, value TEXT, "
+            "PRIMARY KEY (path, size, mtime_ns, ctime_ns, algorithm))"
+        )
+    except BaseException:
+        con.close()
+        raise
+    return con
+
+
+def _checksum_cache_get(
+    key: _StatKey, algorithms: set[Algorithm]
+) -> dict[Algorithm, Checksum]:
+    """return the cached checksums for an unchanged local file"""
+    try:
+        con = _checksum_cache_connect()
+    except (sqlite3.Error, OSError):
+        # the cache is optional: an unusable cache dir must not break checksums
+        return {}
+    try:
+        rows = con.execute(
+            "SELECT algorithm, value FROM checksums "
+            "WHERE path=? AND size=? AND mtime_ns=? AND ctime_ns=?",
+            key,
+        ).fetchall()
+    except sqlite3.Error:
+        return {}
+    finally:
+        con.close()
+    size = key[1]
+    return {
+        alg: Checksum(alg, size, value)
+        for alg, value in ((Algorithm(a), v) for a, v in rows)
+        if alg in algorithms
+    }
+
+
+def _checksum_cache_set(key: _StatKey, checksums: tuple[Checksum, ...]) -> None:
+    """store computed checksums for a local file"""
+    try:
+        con = _checksum_cache_connect()
+    except (sqlite3.Error, OSError):
+        # the cache is optional: an unusable cache dir must not break checksums
+        return
+    try:
+        with con:
+            con.executemany(
+                "INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?, ?, ?)",
+                [(*key, c.algorithm.value, c.value) for c in checksums],
+            )
+    except sqlite3.Error:
+        pass
+    finally:
+        con.close()
+
+
 def compute_checksum(
     f: UrlpathLike,
     *,
@@ -324,6 +453,7 @@ def compute_checksum(
     available_only: bool = False,
     raise_not_local: bool = True,
     storage_options: dict[str, Any] | None = None,
+    ignore_cache: bool = False,
 ) -> tuple[Checksum, ...]:
     """compute a checksum trying to take advantage of remote fs
 
@@ -339,6 +469,8 @@ def compute_checksum(
         raise if a checksum would need to be computed by reading from a remote
     storage_options:
         options passed through with urlpathlike
+    ignore_cache:
+        don't use checksums cached for unchanged local files
 
     Returns
     -------
@@ -374,6 +506,19 @@ def compute_checksum(
                 pass
     missing_algorithms -= set(converted_checksums)
     precomputed_algorithms.update(converted_checksums)
+
+    # local files can reuse checksums computed for the same stat() result
+    if ignore_cache or not settings.checksum_cache:
+        cache_key = None
+    else:
+        cache_key = _local_stat_key(fs, path)
+    if cache_key is not None and missing_algorithms:
+        cached_checksums = _checksum_cache_get(cache_key, missing_algorithms)
+        missing_algorithms -= set(cached_checksums)
+        precomputed_algorithms.update(cached_checksums)
+    else:
+        cached_checksums = {}
+
     if not missing_algorithms or available_only:
         return tuple(precomputed_algorithms.values())
 
@@ -388,6 +533,10 @@ def compute_checksum(
                 chunk_size=fs.blocksize,
             )
 
+    if cache_key is not None:
+        _checksum_cache_set(cache_key, checksums)
+    if cached_checksums:
+        checksums = (*cached_checksums.values(), *checksums)
     return checksums
 
 
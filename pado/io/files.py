@@ -14,6 +14,7 @@ import zipfile
 from ast import literal_eval
 from contextlib import ExitStack
 from contextlib import contextmanager
+from functools import lru_cache
 from typing import IO
 from typing import Any
 from typing import AnyStr
@@ -139,6 +140,13 @@ def find_files(
 
 def is_fsspec_open_file_like(obj: Any) -> TypeGuard[OpenFileLike]:
     """test if an object is like a fsspec.core.OpenFile instance"""
+    # fast paths: the runtime protocol isinstance check below is slow
+    if isinstance(obj, (str, bytes)):
+        return False
+    elif type(obj) is OpenFile:
+        return isinstance(obj.fs, fsspec.AbstractFileSystem) and isinstance(
+            obj.path, str
+        )
     # if isinstance(obj, fsspec.core.OpenFile) doesn't cut it...
     # ... fsspec filesystems just need to quack OpenFile.
     return (
@@ -399,6 +407,10 @@ def urlpathlike_to_fsspec(
     if storage_options is None:
         storage_options = {}
 
+    if isinstance(obj, str) and not obj.lstrip().startswith("{"):
+        # plain urlpath: no need to try decoding json
+        return fsspec.open(obj, mode=mode, **storage_options)
+
     try:
         json_obj = json.loads(obj)  # type: ignore
     except (json.JSONDecodeError, TypeError):
@@ -423,11 +435,20 @@ def urlpathlike_to_fsspec(
             # json_obj["fs"] is json
             if not isinstance(_fs, dict):
                 raise TypeError(f"expected dict, got {_fs!r}")
-            _fs.update(**storage_options)
-            fs = fsspec.AbstractFileSystem.from_json(json.dumps(_fs))
+            if storage_options:
+                _fs.update(**storage_options)
+                fs = fsspec.AbstractFileSystem.from_json(json.dumps(_fs))
+            else:
+                fs = _fs_from_json(json_obj["fs"])
         return fsopen(fs, json_obj["path"], mode=mode)
 
 
+@lru_cache(maxsize=128)
+def _fs_from_json(fs_json: str) -> AbstractFileSystem:
+    """return the filesystem instance for a json serialized fs (cached)"""
+    return fsspec.AbstractFileSystem.from_json(fs_json)
+
+
 def urlpathlike_to_fs_and_path(
     obj: UrlpathLike,
     *,
@@ -547,13 +568,27 @@ def urlpathlike_local_via_fs(
         return urlpathlike_to_fsspec(obj)
 
 
+@lru_cache(maxsize=65536)
+def _str_to_path_parts(obj: str) -> Tuple[str, ...]:
+    """return the path parts of a str urlpath (cached)"""
+    try:
+        json_obj = json.loads(obj)
+    except json.JSONDecodeError:
+        return _os_path_parts(strip_protocol(obj))
+    if not isinstance(json_obj, dict):
+        raise TypeError(f"got json {json_obj!r} of type {type(json_obj)!r}")
+    return _os_path_parts(json_obj["path"])
+
+
 def urlpathlike_to_path_parts(obj: UrlpathLike) -> Tuple[str, ...]:
     """take an urlpathlike object and return the path parts
 
     this does not instantiate the fsspec.AbstractFilesystem class.
     (does not open connections, etc on instantiation)
     """
-    if is_fsspec_open_file_like(obj):
+    if isinstance(obj, str):
+        return _str_to_path_parts(obj)
+    elif is_fsspec_open_file_like(obj):
         path = obj.path
     else:
         try:
@@ -5,13 +5,14 @@ from operator import itemgetter
 from typing import TYPE_CHECKING
 from typing import Optional
 from typing import Sequence
-from typing import Set
 from typing import Tuple
 
 from fsspec import AbstractFileSystem
 from fsspec.core import OpenFile
 from tqdm import tqdm
 
+from pado.images.ids import build_reversed_trie
+from pado.images.ids import match_partial_image_ids_reversed
 from pado.io.files import fsopen
 from pado.io.files import urlpathlike_to_path_parts
 from pado.types import FsspecIOMode
@@ -49,32 +50,23 @@ def match_partial_paths_reversed(
             "cur": urlpathlike,
             "new": None,
         }
-    parts = set(current_path_parts)
 
-    def match(
-        x: Tuple[str, ...], s: Set[Tuple[str, ...]], idx: int
-    ) -> Optional[Tuple[str, ...]]:
+    trie = build_reversed_trie(current_path_parts)
+
+    def match(x: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
         try:
-            xi = x[idx]  # raises index error when out of parts to match
-        except IndexError:
+            return match_partial_image_ids_reversed(trie, x)
+        except ValueError:
             if ignore_ambiguous:
                 return None
-            else:
-                raise ValueError(f"ambiguous: {x!r} -> {s!r}")
-        sj = {sx for sx in s if sx[idx] == xi or xi is None}
-        if len(sj) == 1:
-            return sj.pop()
-        elif len(sj) == 0:
-            return None
-        else:
-            return match(x, sj, idx - 1)
+            raise
 
     if progress:
         new_urlpaths = tqdm(new_urlpaths, desc="trying to match new files")
 
     for new_up in new_urlpaths:
         new_parts = urlpathlike_to_path_parts(new_up)
-        m = match(new_parts, parts, -1)
+        m = match(new_parts)
         if m:
             current_path_parts[m]["new"] = new_up
 
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import enum
 import importlib
-import json
 import platform
 from abc import ABC
+from contextlib import nullcontext
 from datetime import datetime
 from getpass import getuser
 from typing import TYPE_CHECKING
@@ -19,9 +19,11 @@ from typing import Optional
 from typing import Tuple
 from typing import Type
 
+import orjson
 import pandas as pd
 import pyarrow
 import pyarrow.parquet
+from fsspec.implementations.local import LocalFileSystem
 from pandas.io.parquet import BaseImpl
 
 from pado._version import version as _pado_version
@@ -55,23 +57,34 @@ class Store(ABC):
     METADATA_KEY_DATA_VERSION: str | None = None
 
     USE_NULLABLE_DTYPES = False  # todo: switch to True?
-    COMPRESSION = "GZIP"
+    COMPRESSION: str | None = "ZSTD"  # None: store uncompressed
+    COMPRESSION_LEVEL: int | None = 3
+    ROW_GROUP_SIZE: int | None = None  # None: let pyarrow decide
+    DATA_PAGE_SIZE: int | None = 1 << 20
+    PRESERVE_INDEX: bool | None = None  # None: RangeIndex stored as metadata only
+    VALIDATE_DATAFRAME = True  # False: skip for trusted internal dataframes
 
     def __init__(self, version: int, store_type: StoreType):
         self.version = int(version)
         self.type = store_type
+        self._prefix_b = f"{self.METADATA_PREFIX}.".encode()
+        # metadata entries that are identical for every write
+        self._static_md: Dict[bytes, bytes] = {}
+        self._md_set(self._static_md, self.METADATA_KEY_PADO_VERSION, _pado_version)
+        self._md_set(self._static_md, self.METADATA_KEY_STORE_VERSION, self.version)
+        self._md_set(self._static_md, self.METADATA_KEY_STORE_TYPE, self.type.value)
 
     def _md_set(self, dct: MutableMapping[bytes, bytes], key: str, value: Any) -> None:
-        k = f"{self.METADATA_PREFIX}.{key}".encode()  # parquet requires bytes keys
-        dct[k] = json.dumps(value).encode()  # string encode value
+        k = self._prefix_b + key.encode()  # parquet requires bytes keys
+        dct[k] = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
 
     def _md_get(
         self, dct: MutableMapping[bytes, bytes], key: str, default: Any
     ) -> Any:  # require providing a default
-        k = f"{self.METADATA_PREFIX}.{key}".encode()
+        k = self._prefix_b + key.encode()
         if k not in dct:
             return default
-        return json.loads(dct[k])
+        return orjson.loads(dct[k])
 
     def __metadata_set_hook__(
         self, dct: Dict[bytes, bytes], setter: Callable[[dict, str, Any], None]
@@ -83,6 +96,35 @@ class Store(ABC):
     ) -> Optional[dict]:
         """allows getting more metadata in subclass or validate versioning"""
 
+    def _prepare_metadata(
+        self,
+        schema_metadata: Optional[Dict[bytes, bytes]],
+        identifier: Optional[str],
+        user_metadata: Dict[str, Any],
+    ) -> Dict[bytes, bytes]:
+        """return the schema metadata including the pado store metadata"""
+        dct: Dict[bytes, bytes] = {}
+        self._md_set(dct, self.METADATA_KEY_IDENTIFIER, identifier)
+        dct.update(self._static_md)
+        self._md_set(dct, self.METADATA_KEY_CREATED_AT, datetime.utcnow().isoformat())
+        self._md_set(dct, self.METADATA_KEY_CREATED_BY, _get_user_host())
+        if user_metadata:
+            self._md_set(dct, self.METADATA_KEY_USER_METADATA, user_metadata)
+        if schema_metadata:
+            dct.update(schema_metadata)
+
+        # for subclasses
+        self.__metadata_set_hook__(dct, self._md_set)
+        return dct
+
+    def _parquet_write_options(self) -> Dict[str, Any]:
+        """keyword arguments for writing parquet files"""
+        return {
+            "compression": self.COMPRESSION or "NONE",
+            "compression_level": self.COMPRESSION_LEVEL if self.COMPRESSION else None,
+            "data_page_size": self.DATA_PAGE_SIZE,
+        }
+
     def to_urlpath(
         self,
         df: pd.DataFrame,
@@ -93,31 +135,59 @@ class Store(ABC):
         **user_metadata,
     ):
         """store a pandas dataframe with an identifier and user metadata"""
+        if self.VALIDATE_DATAFRAME:
+            BaseImpl.validate_dataframe(df)
+
+        chunk_size = self.ROW_GROUP_SIZE
+        if chunk_size is None or len(df) <= chunk_size:
+            # noinspection PyArgumentList
+            table = pyarrow.Table.from_pandas(
+                df, schema=None, preserve_index=self.PRESERVE_INDEX
+            )
+            return self.to_urlpath_arrow(
+                table,
+                urlpath,
+                identifier=identifier,
+                storage_options=storage_options,
+                **user_metadata,
+            )
+
+        # convert to arrow one row group at a time to limit peak memory
+        schema = pyarrow.Schema.from_pandas(df, preserve_index=self.PRESERVE_INDEX)
+        schema = schema.with_metadata(
+            self._prepare_metadata(schema.metadata, identifier, user_metadata)
+        )
+        open_file = urlpathlike_to_fsspec(
+            urlpath, mode="wb", storage_options=storage_options
+        )
+        with open_file as f, pyarrow.parquet.ParquetWriter(
+            f, schema, **self._parquet_write_options()
+        ) as writer:
+            for start in range(0, len(df), chunk_size):
+                # noinspection PyArgumentList
+                table = pyarrow.Table.from_pandas(
+                    df.iloc[start : start + chunk_size],
+                    schema=schema,
+                    preserve_index=self.PRESERVE_INDEX,
+                )
+                writer.write_table(table)
+
+    def to_urlpath_arrow(
+        self,
+        table: pyarrow.Table,
+        urlpath: UrlpathLike,
+        *,
+        identifier: Optional[str] = None,
+        storage_options: dict[str, Any] | None = None,
+        **user_metadata,
+    ):
+        """store an arrow table with an identifier and user metadata"""
         open_file = urlpathlike_to_fsspec(
             urlpath, mode="wb", storage_options=storage_options
         )
-
-        BaseImpl.validate_dataframe(df)
-
-        # noinspection PyArgumentList
-        table = pyarrow.Table.from_pandas(df, schema=None, preserve_index=None)
-
-        # prepare new schema
-        dct: Dict[bytes, bytes] = {}
-        self._md_set(dct, self.METADATA_KEY_IDENTIFIER, identifier)
-        self._md_set(dct, self.METADATA_KEY_PADO_VERSION, _pado_version)
-        self._md_set(dct, self.METADATA_KEY_STORE_VERSION, self.version)
-        self._md_set(dct, self.METADATA_KEY_STORE_TYPE, self.type.value)
-        self._md_set(dct, self.METADATA_KEY_CREATED_AT, datetime.utcnow().isoformat())
-        self._md_set(dct, self.METADATA_KEY_CREATED_BY, _get_user_host())
-        if user_metadata:
-            self._md_set(dct, self.METADATA_KEY_USER_METADATA, user_metadata)
-        dct.update(table.schema.metadata)
-
-        # for subclasses
-        self.__metadata_set_hook__(dct, self._md_set)
 
         # rewrite table schema
+        dct = self._prepare_metadata(table.schema.metadata, identifier, user_metadata)
         table = table.replace_schema_metadata(dct)
 
         with open_file as f:
@@ -125,13 +195,26 @@ class Store(ABC):
             pyarrow.parquet.write_table(
                 table,
                 f,
-                compression=self.COMPRESSION,
+                row_group_size=self.ROW_GROUP_SIZE,
+                **self._parquet_write_options(),
             )
 
     def from_urlpath(
-        self, urlpath: UrlpathLike, *, storage_options: dict[str, Any] | None = None
+        self,
+        urlpath: UrlpathLike,
+        *,
+        storage_options: dict[str, Any] | None = None,
+        columns: list[str] | None = None,
+        filters: list[tuple[str, str, Any]] | None = None,
+        metadata_only: bool = False,
     ) -> Tuple[pd.DataFrame, str, Dict[str, Any]]:
-        """load dataframe and info from urlpath"""
+        """load dataframe and info from urlpath
+
+        `columns` and `filters` are forwarded to `pyarrow.parquet.read_table`
+        to only load the requested subset of the stored dataframe.
+        With `metadata_only=True` only the parquet footer is read and the
+        returned dataframe is None.
+        """
         open_file = urlpathlike_to_fsspec(
             urlpath, mode="rb", storage_options=storage_options
         )
@@ -152,12 +235,32 @@ class Store(ABC):
             }
             to_pandas_kwargs["types_mapper"] = mapping.get
 
-        table = pyarrow.parquet.read_table(
-            open_file.path, use_pandas_metadata=True, filesystem=open_file.fs
-        )
+        # memory map local files, otherwise open read-only via fsspec
+        # (`urlpath` might be an OpenFile created for writing)
+        is_local = isinstance(open_file.fs, LocalFileSystem)
+        if is_local:
+            source = nullcontext(open_file.path)
+        else:
+            source = open_file.fs.open(open_file.path, mode="rb")
+        with source as f:
+            # fetch the footer once and reuse it for metadata and data
+            pf = pyarrow.parquet.ParquetFile(f, memory_map=is_local)
+            _md = pf.schema_arrow.metadata
+            if metadata_only:
+                table = None
+            elif filters is None:
+                table = pf.read(columns=columns, use_pandas_metadata=True)
+            else:
+                table = pyarrow.parquet.read_table(
+                    open_file.path,
+                    columns=columns,
+                    filters=filters,
+                    use_pandas_metadata=True,
+                    filesystem=None if is_local else open_file.fs,
+                    memory_map=is_local,
+                )
 
         # retrieve the additional metadata stored in the parquet
-        _md = table.schema.metadata
         identifier = self._md_get(_md, self.METADATA_KEY_IDENTIFIER, None)
         store_version = self._md_get(_md, self.METADATA_KEY_STORE_VERSION, 0)
         store_type = self._md_get(_md, self.METADATA_KEY_STORE_TYPE, None)
@@ -182,7 +285,14 @@ class Store(ABC):
                 "please update pado"
             )
 
-        df = table.to_pandas(**to_pandas_kwargs)
+        if table is None:
+            df = None
+        else:
+            # convert column by column and release the arrow buffers while doing so
+            df = table.to_pandas(
+                split_blocks=True, self_destruct=True, **to_pandas_kwargs
+            )
+            del table
         version_info = {
             self.METADATA_KEY_PADO_VERSION: pado_version,
             self.METADATA_KEY_STORE_VERSION: self.version,
@@ -203,13 +313,11 @@ def get_store_type(
     open_file = urlpathlike_to_fsspec(
         urlpath, mode="rb", storage_options=storage_options
     )
-    table = pyarrow.parquet.read_table(
-        open_file.path, use_pandas_metadata=True, filesystem=open_file.fs
-    )
+    schema = pyarrow.parquet.read_schema(open_file.path, filesystem=open_file.fs)
     key_store_type = f"{Store.METADATA_PREFIX}.{Store.METADATA_KEY_STORE_TYPE}".encode()
     try:
-        store_type = json.loads(table.schema.metadata[key_store_type])
-    except (KeyError, json.JSONDecodeError):
+        store_type = orjson.loads(schema.metadata[key_store_type])
+    except (KeyError, orjson.JSONDecodeError):
         return None
     return StoreType(store_type)
 
@@ -221,19 +329,17 @@ def get_store_metadata(
     open_file = urlpathlike_to_fsspec(
         urlpath, mode="rb", storage_options=storage_options
     )
-    table = pyarrow.parquet.read_table(
-        open_file.path, use_pandas_metadata=True, filesystem=open_file.fs
-    )
+    schema = pyarrow.parquet.read_schema(open_file.path, filesystem=open_file.fs)
     md = {}
-    for k, v in dict(table.schema.metadata).items():
+    for k, v in dict(schema.metadata).items():
         k = k.decode()
         if not k.startswith(Store.METADATA_PREFIX):
             continue
         else:
             k = k[len(Store.METADATA_PREFIX) + 1 :]
         try:
-            v = json.loads(v)
-        except json.JSONDecodeError as err:
+            v = orjson.loads(v)
+        except orjson.JSONDecodeError as err:
             v = err
         md[k] = v
     return md
@@ -4,6 +4,7 @@ import base64
 import json
 import os
 import sys
+import uuid
 import warnings
 from contextlib import AbstractContextManager
 from typing import TYPE_CHECKING
@@ -13,6 +14,7 @@ from typing import MutableMapping
 from typing import Optional
 
 import fsspec
+import orjson
 from fsspec.core import OpenFile
 
 from pado.settings import pado_config_path
@@ -49,6 +51,7 @@ class _JsonFileData(AbstractContextManager):
         super().__init__()
         self._name: str | None = name
         self._data: Optional[dict] = None
+        self._dirty = False
 
     @property
     def data(self):
@@ -62,16 +65,17 @@ class _JsonFileData(AbstractContextManager):
 
     def __enter__(self):
         # load the data
+        self._dirty = False
         try:
-            with self._open(mode="r") as f:
+            with self._open(mode="rb") as f:
                 contents = f.read()
         except FileNotFoundError:
             self._data = {}
             return self
 
         try:
-            self._data = json.loads(contents)
-        except json.JSONDecodeError:
+            self._data = orjson.loads(contents)
+        except orjson.JSONDecodeError:
             of = self._open(mode="w")
             fn = of.path
             fs = of.fs
@@ -81,8 +85,25 @@ class _JsonFileData(AbstractContextManager):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        with self._open(mode="w") as f:
-            json.dump(self._data, f, indent=2)
+        if not self._dirty:
+            # nothing changed, no need to rewrite the file
+            self._data = None
+            return
+        contents = orjson.dumps(self._data, option=orjson.OPT_INDENT_2)
+        of = self._open(mode="wb")
+        if getattr(of.fs, "local_file", False):
+            # write to a temporary file and replace to never leave a partial file
+            tmp_path = f"{of.path}.{uuid.uuid4().hex}.tmp"
+            try:
+                with open(tmp_path, mode="wb") as f:
+                    f.write(contents)
+                os.replace(tmp_path, of.path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+        else:
+            with of as f:
+                f.write(contents)
         self._data = None
 
     def _open(self, mode: FsspecIOMode) -> OpenFile:
@@ -151,11 +172,13 @@ class _UserInputSecretStore(MutableMapping[str, str], _JsonFileData):
             raise KeyError("prefer using .set(...)")
         v = json.dumps(v)
         self.data[k] = base64.urlsafe_b64encode(v.encode()).decode()
+        self._dirty = True
 
     def __delitem__(self, k: str) -> None:
         if self.parse_secret(k) is None:
             raise KeyError(k)
         del self.data[k]
+        self._dirty = True
 
     def __getitem__(self, k: str) -> str:
         if self.parse_secret(k) is None:
@@ -264,7 +287,10 @@ class _DatasetRegistry(MutableMapping[str, UrlpathWithStorageOptions], _JsonFile
             raise TypeError(
                 f"name must be a string, got {name!r} of {type(name).__name__}"
             )
-        value = self.data[name]
+        return self._to_urlpath_with_storage_options(self.data[name])
+
+    @staticmethod
+    def _to_urlpath_with_storage_options(value: Any) -> UrlpathWithStorageOptions:
         if isinstance(value, str):
             value = get_secret(value, default=value)
             return UrlpathWithStorageOptions(value)
@@ -301,13 +327,15 @@ class _DatasetRegistry(MutableMapping[str, UrlpathWithStorageOptions], _JsonFile
             raise ValueError(
                 f"unsupported value: {path!r} of type {type(path).__name__!r}"
             )
+        self._dirty = True
 
     def __delitem__(self, name: str):
         del self.data[name]
+        self._dirty = True
 
     def items(self):
-        for name in self:
-            yield name, self[name]
+        for name, value in self.data.items():
+            yield name, self._to_urlpath_with_storage_options(value)
 
 
 def dataset_registry(
@@ -71,6 +71,9 @@ settings = Dynaconf(
         Validator("registry", condition=validate_registries, default={}),
         Validator("allow_pickled_urlpaths", cast=bool, default=False),
         Validator("block_image_id_eval", cast=bool, default=False),
+        Validator("tile_cache_bytes", cast=int, default=0),
+        Validator("image_block_cache_size", cast=int, default=0),
+        Validator("checksum_cache", cast=bool, default=True),
     ],
 )
 
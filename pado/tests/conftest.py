@@ -11,6 +11,17 @@ from pado.mock import mock_images
 from pado.settings import settings
 
 
+@pytest.fixture(scope="session", autouse=True)
+def mock_cache_path(tmp_path_factory):
+    # keep cache files created during tests out of the user cache
+    old_cache_path = settings.cache_path
+    settings.configure(cache_path=tmp_path_factory.mktemp("pado_cache"))
+    try:
+        yield
+    finally:
+        settings.configure(cache_path=old_cache_path)
+
+
 @pytest.fixture(scope="function")
 def datasource(tmp_path):
     ds = mock_dataset(tmp_path)
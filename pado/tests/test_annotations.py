@@ -1,8 +1,16 @@
 from __future__ import annotations
 
+import os
+import time
+
 import pytest
+from pandas.testing import assert_frame_equal
+from pandas.testing import assert_series_equal
 
 from pado.annotations import AnnotationProvider
+from pado.annotations import Annotations
+from pado.annotations import GroupedAnnotationProvider
+from pado.annotations.providers import create_annotation_provider
 from pado.images.ids import ImageId
 
 
@@ -43,3 +51,202 @@ def test_annotation_serialization_roundtrip(annotations, tmp_path):
     b0 = new_annotations[iid][0]
     assert a0 == b0
     assert annotations[iid] == new_annotations[iid]
+
+
+def test_annotation_provider_getitem(annotations):
+    iid = ImageId("mock_image_0.svs", site="mock")
+    ap = AnnotationProvider(annotations.df)
+
+    expected = annotations.df.loc[[iid.to_str()], :].reset_index(drop=True)
+    assert_frame_equal(ap[iid].df, expected.astype(ap[iid].df.dtypes))
+    assert ap[iid].df["classification"].dtype == object
+
+    with pytest.raises(KeyError):
+        _ = ap[ImageId("not-there.svs", site="mock")]
+
+
+def test_annotation_provider_to_parquet_with_changes(annotations, tmp_path):
+    ap = AnnotationProvider(annotations)
+    iid0 = ImageId("mock_image_0.svs", site="mock")
+    iid1 = ImageId("mock_image_1.svs", site="mock")
+    annos = ap[iid1]
+    ap[iid0] = Annotations(image_id=iid0)
+
+    p = tmp_path.joinpath("_changed.annotations.parquet")
+    ap.to_parquet(p)
+    new_ap = AnnotationProvider.from_parquet(p)
+
+    assert set(new_ap) == set(ap) - {iid0}
+    assert new_ap[iid1] == annos
+
+
+def test_grouped_annotation_provider_to_parquet(annotations, tmp_path):
+    ap = GroupedAnnotationProvider(annotations, AnnotationProvider({}))
+
+    p = tmp_path.joinpath("_grouped.annotations.parquet")
+    ap.to_parquet(p)
+    new_ap = AnnotationProvider.from_parquet(p)
+
+    assert set(new_ap) == set(annotations)
+    assert len(new_ap.df) == len(annotations.df)
+
+
+def test_annotation_provider_len(annotations):
+    ap = AnnotationProvider(annotations)
+    assert len(ap) == 3
+
+    iid = ImageId("new_image.svs", site="mock")
+    ap[iid] = Annotations(image_id=iid)
+    assert len(ap) == 4
+
+    del ap[iid]
+    assert len(ap) == 3
+
+
+def test_annotation_provider_from_dict(annotations):
+    ap = AnnotationProvider(dict(annotations.items()))
+    assert set(ap) == set(annotations)
+    for iid in annotations:
+        assert ap[iid] == annotations[iid]
+
+
+def test_annotation_provider_from_parquet_only_ids(annotations, tmp_path):
+    p = tmp_path.joinpath("_subset.annotations.parquet")
+    annotations.to_parquet(p)
+    iid = ImageId("mock_image_0.svs", site="mock")
+
+    ap = AnnotationProvider.from_parquet(p, only_ids=[iid])
+    assert set(ap) == {iid}
+    assert ap[iid] == annotations[iid]
+
+    ap = AnnotationProvider.from_parquet(p, only_ids=[])
+    assert len(ap) == 0
+
+
+def test_annotation_provider_contains(annotations):
+    ap = AnnotationProvider(annotations)
+    iid = ImageId("new_image.svs", site="mock")
+    assert ImageId("mock_image_0.svs", site="mock") in ap
+    assert iid not in ap
+    assert "mock_image_0.svs" not in ap
+
+    ap[iid] = Annotations(image_id=iid)
+    assert iid in ap
+    assert iid in GroupedAnnotationProvider(annotations, ap)
+
+
+def test_grouped_annotation_provider_keys_follow_changes(annotations):
+    ap = AnnotationProvider({})
+    grouped = GroupedAnnotationProvider(annotations, ap)
+    assert len(grouped) == 3
+
+    iid = ImageId("new_image.svs", site="mock")
+    ap[iid] = Annotations(image_id=iid)
+    assert len(grouped) == 4
+    assert iid in set(grouped)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_create_annotation_provider(annotations, tmp_path, workers):
+    for iid in annotations:
+        tmp_path.joinpath(f"{iid.last}.json").write_text("{}")
+
+    def image_id_func(file, parts, identifier):
+        return ImageId(parts[-1][: -len(".json")], site="mock")
+
+    def annotations_func(file):
+        name = os.path.basename(file.path)[: -len(".json")]
+        return Annotations(annotations[ImageId(name, site="mock")].df.copy())
+
+    ap = create_annotation_provider(
+        tmp_path,
+        "*.json",
+        output_urlpath=None,
+        image_id_func=image_id_func,
+        annotations_func=annotations_func,
+        workers=workers,
+    )
+    assert set(ap) == set(annotations)
+    for iid in annotations:
+        assert ap[iid] == annotations[iid]
+
+
+def test_create_annotation_provider_workers_keeps_order(annotations, tmp_path):
+    for iid in annotations:
+        tmp_path.joinpath(f"{iid.last}.json").write_text("{}")
+
+    def image_id_func(file, parts, identifier):
+        return ImageId(parts[-1][: -len(".json")], site="mock")
+
+    def annotations_func(file):
+        name = os.path.basename(file.path)[: -len(".json")]
+        time.sleep(0.05 * (3 - int(name[-len("0.svs")])))  # finish in reverse
+        return Annotations(annotations[ImageId(name, site="mock")].df.copy())
+
+    aps = [
+        create_annotation_provider(
+            tmp_path,
+            "*.json",
+            output_urlpath=None,
+            image_id_func=image_id_func,
+            annotations_func=annotations_func,
+            workers=workers,
+        )
+        for workers in [None, 1, 3]
+    ]
+    assert list(aps[0]) == list(aps[1]) == list(aps[2])
+
+
+def test_annotation_provider_delitem_with_changes(annotations):
+    ap = AnnotationProvider(annotations)
+    iid0 = ImageId("mock_image_0.svs", site="mock")
+    iid1 = ImageId("mock_image_1.svs", site="mock")
+    _ = ap[iid1]  # loads iid1 into the store
+
+    del ap[iid0]
+    assert iid0 not in ap
+    assert iid0 not in set(ap)
+    assert iid0.to_str() not in ap.df.index
+    with pytest.raises(KeyError):
+        del ap[iid0]
+
+
+def test_annotation_provider_df_dtypes_stable(annotations):
+    ap = AnnotationProvider(annotations)
+    iid = ImageId("mock_image_0.svs", site="mock")
+    dtypes = ap.df.dtypes
+
+    ap[iid] = ap[iid]
+    assert_series_equal(ap.df.dtypes, dtypes)
+
+
+def test_annotation_provider_iter_does_not_parse_ids(annotations, monkeypatch):
+    ap = AnnotationProvider(annotations)
+    iid = ImageId("new_image.svs", site="mock")
+    ap[iid] = Annotations(image_id=iid)
+    expected = set(annotations) | {iid}
+    assert set(ap) == expected
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("image ids should not be parsed again")
+
+    monkeypatch.setattr(ImageId, "from_str", _fail)
+    for image_id in ap:
+        ap[image_id] = ap[image_id]  # loading into the store while iterating
+    assert set(ap) == expected
+    assert len(list(ap)) == len(expected)
+
+
+def test_annotation_provider_iter_order_stable(annotations):
+    ap = AnnotationProvider(annotations)
+    iid = ImageId("new_image.svs", site="mock")
+    ap[iid] = Annotations(image_id=iid)
+    ids = list(ap)
+    assert ids == [*annotations, iid]
+
+    _ = ap[ids[1]]  # loading into the store keeps the order
+    assert list(ap) == ids
+    ap[ids[0]] = Annotations(ap[ids[0]].df.copy())  # so does replacing
+    assert list(ap) == ids
+    del ap[ids[1]]
+    assert list(ap) == [ids[0], *ids[2:]]
@@ -2,19 +2,28 @@ from __future__ import annotations
 
 import os
 import pickle
+from pathlib import PurePath
 from sys import float_info
 
 import fsspec
+import numpy as np
 import pytest
 
 from pado.images.ids import ImageId
+from pado.images.ids import build_reversed_trie
+from pado.images.ids import image_id_from_parts_without_extension
 from pado.images.ids import load_image_ids_from_csv
+from pado.images.ids import match_partial_image_ids_reversed
+from pado.images.image import FileInfo
+from pado.images.image import Image
+from pado.images.image import ImageMetadata
 from pado.images.providers import update_image_provider_urlpaths
 from pado.images.utils import MPP
 from pado.images.utils import IntPoint
 from pado.images.utils import IntSize
 from pado.images.utils import match_mpp
 from pado.io.files import urlpathlike_to_fsspec
+from pado.settings import settings
 
 # --- test constructors -----------------------------------------------
 
@@ -88,6 +97,15 @@ def test_image_id_pickle_roundtrip(image_id):
     assert image_id == new_id
 
 
+@pytest.mark.parametrize("image_id", IMAGE_ID_ARG_KWARG_LIST, indirect=True)
+def test_image_id_pickle_does_not_store_cache(image_id):
+    _ = hash(image_id), image_id.to_str(), image_id.to_json()
+    new_id = pickle.loads(pickle.dumps(image_id))  # nosec B301
+    assert new_id._str is new_id._json is new_id._hash is None
+    assert new_id.to_str() == image_id.to_str()
+    assert new_id.to_json() == image_id.to_json()
+
+
 @pytest.mark.parametrize("image_id", IMAGE_ID_ARG_KWARG_LIST, indirect=True)
 def test_image_id_str_roundtrip(image_id):
     id_str = image_id.to_str()
@@ -128,6 +146,49 @@ def test_image_id_from_str_with_subclass():
         Why.from_str(serialized)
 
 
+@pytest.mark.parametrize(
+    "id_str,expected",
+    [
+        pytest.param("ImageId('a', 'b')", ImageId("a", "b"), id="plain"),
+        pytest.param('ImageId("a", site="s")', ImageId("a", site="s"), id="site"),
+        pytest.param("ImageId('a, b', \"c'd\")", ImageId("a, b", "c'd"), id="quotes"),
+        pytest.param("ImageId('a\\'b')", ImageId("a'b"), id="escaped"),
+        pytest.param("ImageId( 'a' ,'b' )", ImageId("a", "b"), id="whitespace"),
+    ],
+)
+def test_image_id_from_str_formats(id_str, expected):
+    image_id = ImageId.from_str(id_str)
+    assert image_id.site == expected.site
+    assert image_id.parts == expected.parts
+
+
+@pytest.mark.parametrize(
+    "parts",
+    [("a.svs",), ("x", "a.tar.gz"), (".hidden",), ("a.",), ("a",), ("a..b",)],
+)
+def test_image_id_from_parts_without_extension(parts):
+    image_id = image_id_from_parts_without_extension(None, parts, "site")
+    assert image_id.parts == list(PurePath(*parts).with_suffix("").parts)
+    assert image_id.site == "site"
+
+
+def test_match_partial_image_ids_reversed():
+    ids = {
+        ImageId("a", "x.svs", site="s"),
+        ImageId("b", "x.svs", site="s"),
+        ImageId("c", "y.svs", site="s"),
+    }
+    trie = build_reversed_trie(ids)
+    for candidates in [ids, trie]:
+        m = match_partial_image_ids_reversed(candidates, ("y.svs",))
+        assert m == ImageId("c", "y.svs", site="s")
+        m = match_partial_image_ids_reversed(candidates, ImageId("b", "x.svs"))
+        assert m == ImageId("b", "x.svs", site="s")
+        assert match_partial_image_ids_reversed(candidates, ("z.svs",)) is None
+        with pytest.raises(ValueError):
+            match_partial_image_ids_reversed(candidates, ("x.svs",))
+
+
 @pytest.mark.parametrize("image_id", IMAGE_ID_ARG_KWARG_LIST, indirect=True)
 def test_image_id_json_roundtrip(image_id):
     id_json = image_id.to_json()
@@ -182,9 +243,10 @@ def test_image_id_to_base64_encoding():
 
 def test_image_id_current_hash_assumption():
     iid = ImageId("a", "b", site="mars")
-    fn_tuple = ("b",)
-    assert hash(iid) == hash(fn_tuple)
-    assert iid != fn_tuple
+    parts_tuple = ("a", "b")
+    assert hash(iid) == hash(parts_tuple)
+    assert hash(iid) == hash(ImageId("a", "b"))
+    assert iid != parts_tuple
 
 
 def test_image_id_without_site_when_used_as_key():
@@ -379,3 +441,195 @@ def test_mpp_cmp():
     assert not (MPP(1, 1) < MPP(0.25, 0.25))
     assert not (MPP(1, 1) <= MPP(0.25, 0.25))
     assert MPP(1, 1) >= MPP(0.25, 0.25)
+
+
+def test_image_dimensions_without_metadata(dataset):
+    image_id = next(iter(dataset.images))
+    loaded = dataset.images[image_id]
+
+    image = Image(loaded.urlpath)
+    with image:
+        assert image.dimensions == loaded.dimensions
+        assert image.mpp == loaded.mpp
+        assert image.level_mpp == loaded.level_mpp
+        assert image._metadata is None
+
+
+def test_image_from_obj_models(dataset):
+    image_id = next(iter(dataset.images))
+    record = dataset.images.df.loc[image_id.to_str()]
+    image = Image.from_obj(record)
+
+    assert image.metadata == ImageMetadata.parse_obj(record)
+    assert image.file_info == FileInfo.parse_obj(record)
+    assert image.to_record() == Image.from_obj(image.to_record()).to_record()
+
+
+def test_image_tile_cache(dataset, monkeypatch):
+    import pado.images.image
+
+    cache = pado.images.image._TileCache(max_bytes=2**24)
+    monkeypatch.setattr(pado.images.image, "_PADO_TILE_CACHE", cache)
+    monkeypatch.setattr(pado.images.image, "_PADO_TILE_CACHE_BYTES", cache.max_bytes)
+
+    image = dataset.images[next(iter(dataset.images))]
+    with image:
+        a0 = image.get_array(IntPoint(0, 0), IntSize(32, 32), level=0)
+        a1 = image.get_array(IntPoint(0, 0), IntSize(32, 32), level=0)
+        t0 = image.get_thumbnail((16, 16))
+        t1 = image.get_thumbnail((16, 16))
+    assert a0 is a1
+    assert not a0.flags.writeable
+    assert t0 is not t1 and t0.tobytes() == t1.tobytes()
+    assert cache.current_bytes == a0.nbytes + t0.width * t0.height * 3
+    assert cache.stats() == (2, 2)
+
+
+def test_image_tile_cache_key_computed_once(dataset, monkeypatch):
+    import pado.images.image
+
+    cache = pado.images.image._TileCache(max_bytes=2**24)
+    monkeypatch.setattr(pado.images.image, "_PADO_TILE_CACHE", cache)
+    monkeypatch.setattr(pado.images.image, "_PADO_TILE_CACHE_BYTES", cache.max_bytes)
+    calls = []
+    to_string = pado.images.image.urlpathlike_to_string
+    monkeypatch.setattr(
+        pado.images.image,
+        "urlpathlike_to_string",
+        lambda u: calls.append(u) or to_string(u),
+    )
+
+    image = dataset.images[next(iter(dataset.images))]
+    with image:
+        for xy in [(0, 0), (32, 0), (0, 32)]:
+            image.get_array(IntPoint(*xy), IntSize(32, 32), level=0)
+        image.get_thumbnail((16, 16))
+    assert len(calls) == 1
+
+
+def test_tile_cache_evicts_least_recently_used():
+    from pado.images.image import _TileCache
+
+    cache = _TileCache(max_bytes=10)
+    cache.put("a", 1, 4)
+    cache.put("b", 2, 4)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 4)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    cache.put("d", 4, 11)
+    assert cache.get("d") is None
+    assert cache.current_bytes == 8
+
+
+def test_image_open_with_block_cache(dataset, monkeypatch):
+    import pado.images.image
+
+    image = dataset.images[next(iter(dataset.images))]
+    with urlpathlike_to_fsspec(image.urlpath, mode="rb") as f:
+        data = f.read()
+    fs = fsspec.filesystem("memory")
+    fs.pipe("/block_cache/image.svs", data)
+
+    monkeypatch.setattr(pado.images.image, "_BLOCK_CACHE_PROTOCOLS", {"memory"})
+    old_block_size = settings.image_block_cache_size
+    settings.configure(image_block_cache_size=2**16)
+    try:
+        of = fsspec.core.OpenFile(fs, "/block_cache/image.svs")
+        with Image(of) as cached, image:
+            fh = cached._fh
+            assert fh is not None
+            closed = []
+            monkeypatch.setattr(fh, "close", lambda: closed.append(True))
+            assert cached.dimensions == image.dimensions
+            np.testing.assert_array_equal(
+                cached.get_array(IntPoint(0, 0), IntSize(16, 16), level=0),
+                image.get_array(IntPoint(0, 0), IntSize(16, 16), level=0),
+            )
+        assert closed == [True]
+        assert cached._fh is None
+    finally:
+        settings.configure(image_block_cache_size=old_block_size)
+        fs.rm("/block_cache", recursive=True)
+
+
+def test_image_to_record_matches_serialized_model(dataset):
+    from pado.images.image import _SerializedImage
+
+    for image in dataset.images.values():
+        record = image.to_record()
+        assert list(record) == list(Image.__fields__)
+        assert record == _SerializedImage.parse_obj(record).dict()
+
+
+def test_image_get_array_validation(dataset):
+    image = dataset.images[next(iter(dataset.images))]
+    with image:
+        mpp0 = image.mpp
+        mpp1 = mpp0.scale(2.0)
+        loc = IntPoint(0, 0)
+        assert image.get_array(IntPoint(0, 0, mpp0), IntSize(8, 8, mpp0), 0).shape
+        with pytest.raises(TypeError):
+            image.get_array((0, 0), IntSize(8, 8), 0)
+        with pytest.raises(TypeError):
+            image.get_array(loc, (8, 8), 0)
+        with pytest.raises(ValueError, match="location not at level 0"):
+            image.get_array(IntPoint(0, 0, mpp1), IntSize(8, 8), 0)
+        with pytest.raises(ValueError, match="level error"):
+            image.get_array(loc, IntSize(8, 8), image.level_count)
+        with pytest.raises(ValueError, match="region not at level 0"):
+            image.get_array(loc, IntSize(8, 8, mpp1), 0)
+
+
+@pytest.mark.parametrize("xy", [(8, 16), (-4, -4)], ids=["in-bounds", "padded"])
+def test_image_get_array_into(dataset, xy):
+    image = dataset.images[next(iter(dataset.images))]
+    with image:
+        for level in range(image.level_count):
+            expected = image.get_array(IntPoint(*xy), IntSize(32, 24), level=level)
+            out = np.zeros_like(expected)
+            res = image.get_array_into(out, IntPoint(*xy), IntSize(32, 24), level)
+            assert res is out
+            np.testing.assert_array_equal(out, expected)
+
+        with pytest.raises(ValueError):
+            image.get_array_into(out, IntPoint(0, 0), IntSize(24, 32), level=0)
+
+
+def test_image_level_properties_cached_until_close(dataset):
+    image = Image(dataset.images[next(iter(dataset.images))].urlpath)
+    with image:
+        level_mpp = image.level_mpp
+        assert image.level_mpp is level_mpp
+        assert image.level_dimensions is image.level_dimensions
+        assert image.mpp == level_mpp[0]
+    assert image._cached == {}
+    with pytest.raises(RuntimeError):
+        _ = image.level_dimensions
+
+
+def test_image_get_array_at_mpp_caches_best_level(dataset):
+    image = Image(dataset.images[next(iter(dataset.images))].urlpath)
+    with image:
+        mpp = image.mpp.scale(2.0)
+        loc, size = IntPoint(0, 0, mpp=mpp), IntSize(8, 8, mpp=mpp)
+        arr = image.get_array_at_mpp(loc, size, target_mpp=mpp)
+        assert arr.shape[:2] == (8, 8)
+        assert image._cached["_best_levels"] == {
+            (mpp.x, mpp.y, 0.0, 0.0): (0, image.mpp)
+        }
+        arr2 = image.get_array_at_mpp(loc, size, target_mpp=mpp)
+        np.testing.assert_array_equal(arr, arr2)
+    assert image._cached == {}
+
+
+def test_image_get_array_at_mpp_base_resolution(dataset):
+    image = Image(dataset.images[next(iter(dataset.images))].urlpath)
+    with image:
+        mpp = image.mpp
+        arr = image.get_array_at_mpp(
+            IntPoint(3, 5, mpp=mpp), IntSize(20, 10, mpp=mpp), target_mpp=mpp
+        )
+        expected = image.get_array(IntPoint(3, 5), IntSize(20, 10), level=0)
+        np.testing.assert_array_equal(arr, expected)
+        assert "_best_levels" not in image._cached
@@ -3,11 +3,22 @@ testing the fsspec file urlpath conversions
 """
 from __future__ import annotations
 
+import hashlib
+import io
+
+import fsspec
 import pytest
 
+from pado.io.checksum import Algorithm
+from pado.io.checksum import checksum_md5
+from pado.io.checksum import checksum_multiple
+from pado.io.checksum import compute_checksum
 from pado.io.files import _OpenFileAndParts
 from pado.io.files import find_files
+from pado.io.files import is_fsspec_open_file_like
 from pado.io.files import urlpathlike_is_localfile
+from pado.io.files import urlpathlike_to_fsspec
+from pado.io.files import urlpathlike_to_path_parts
 from pado.io.files import urlpathlike_to_string
 
 
@@ -57,3 +68,86 @@ def test_urlpathlike_is_localfile(tmpdir, urlpath, must_exist, expected_result):
     assert not urlpathlike_is_localfile(
         "https://example.com/image.svs", must_exist=must_exist
     )
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1024])
+def test_checksum_multiple_matches_md5(chunk_size):
+    data = bytes(range(256)) * 13
+    expected = hashlib.md5(data).hexdigest()
+
+    assert checksum_md5(io.BytesIO(data), chunk_size=chunk_size) == expected
+    (c,) = checksum_multiple(
+        io.BytesIO(data), algorithms={Algorithm.MD5}, chunk_size=chunk_size
+    )
+    assert c.value == expected
+    assert c.file_size == len(data)
+
+
+def test_compute_checksum_cached_for_unchanged_file(tmp_path, monkeypatch):
+    fn = tmp_path.joinpath("file.bin")
+    fn.write_bytes(b"abc" * 100)
+    (c0,) = compute_checksum(fn, algorithms=Algorithm.MD5)
+    assert c0.value == hashlib.md5(b"abc" * 100).hexdigest()
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("checksum should be cached")
+
+    with monkeypatch.context() as m:
+        m.setattr("pado.io.checksum.checksum_multiple", _fail)
+        assert compute_checksum(fn, algorithms=Algorithm.MD5) == (c0,)
+        assert compute_checksum(fn, algorithms=Algorithm.MD5, available_only=True)
+        with pytest.raises(AssertionError):
+            compute_checksum(fn, algorithms=Algorithm.MD5, ignore_cache=True)
+
+    fn.write_bytes(b"changed")
+    (c1,) = compute_checksum(fn, algorithms=Algorithm.MD5)
+    assert c1.value == hashlib.md5(b"changed").hexdigest()
+
+
+def test_urlpathlike_to_path_parts():
+    parts = ("/", "mybucket", "image.svs")
+    assert urlpathlike_to_path_parts("file:///mybucket/image.svs") == parts
+    assert urlpathlike_to_path_parts("/mybucket/image.svs") == parts
+    assert urlpathlike_to_path_parts('{"path": "/mybucket/image.svs"}') == parts
+    with pytest.raises(TypeError):
+        urlpathlike_to_path_parts("[1, 2]")
+
+
+def test_urlpathlike_to_fsspec_reuses_filesystem(tmp_path):
+    urlpath = urlpathlike_to_string(fsspec.open(str(tmp_path / "a.txt")))
+    of0 = urlpathlike_to_fsspec(urlpath)
+    of1 = urlpathlike_to_fsspec(urlpath)
+    assert of0.fs is of1.fs
+    assert of0.path == of1.path == str(tmp_path / "a.txt")
+    assert urlpathlike_to_fsspec(str(tmp_path / "a.txt")).path == of0.path
+
+
+def test_is_fsspec_open_file_like(tmp_path):
+    of = fsspec.open(str(tmp_path / "a.txt"))
+    assert is_fsspec_open_file_like(of)
+
+    class _DuckOpenFile:
+        def __init__(self, fs, path):
+            self.fs, self.path = fs, path
+
+        def __enter__(self):
+            return self.fs.open(self.path)
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            pass
+
+    assert is_fsspec_open_file_like(_DuckOpenFile(of.fs, of.path))
+    assert not is_fsspec_open_file_like(str(tmp_path / "a.txt"))
+    assert not is_fsspec_open_file_like(tmp_path / "a.txt")
+
+
+def test_compute_checksum_unusable_cache_dir(tmp_path, monkeypatch):
+    fn = tmp_path.joinpath("file.bin")
+    fn.write_bytes(b"abc")
+
+    def _raise(*args, **kwargs):
+        raise PermissionError("read-only cache dir")
+
+    monkeypatch.setattr("pado.io.checksum.pado_cache_path", _raise)
+    (c0,) = compute_checksum(fn, algorithms=Algorithm.MD5)
+    assert c0.value == hashlib.md5(b"abc").hexdigest()
@@ -3,12 +3,15 @@ from __future__ import annotations
 import warnings
 from unittest import mock
 
+import numpy as np
 import pytest
 
 from pado.dataset import PadoItem
 from pado.images.tiles import FastGridTiling
+from pado.images.tiles import GridTileIndex
 from pado.images.tiles import PadoTileItem
 from pado.images.utils import MPP
+from pado.images.utils import IntSize
 from pado.itertools import RetryErrorHandler
 from pado.itertools import SlideDataset
 from pado.itertools import TileDataset
@@ -162,3 +165,45 @@ def test_retry_handler_exception_chains():
     exc_context = Exception()
     exc_context.__context__ = ZeroDivisionError()
     assert retry_handler(..., 2, exc_context) is True
+
+
+@pytest.mark.parametrize("masked", [False, True])
+def test_grid_tile_index_bounds_at_mpp(masked):
+    mpp = MPP(1.0, 1.0)
+    ti = GridTileIndex.from_mask(
+        image_size=IntSize(1000, 1200, mpp=mpp),
+        tile_size=IntSize(100, 100, mpp=mpp),
+        overlap=10,
+        target_mpp=mpp,
+        mask=np.eye(12, 10, dtype=bool) if masked else None,
+    )
+    target_mpp = MPP(2.0, 2.0)
+    bounds = ti.bounds_at_mpp(target_mpp)
+    assert bounds.shape == (len(ti), 4)
+
+    for i in [0, 1, len(ti) - 1]:
+        location, size, _ = ti[i]
+        x0, y0 = location.scale(target_mpp).as_tuple()
+        w, h = size.scale(target_mpp).as_tuple()
+        assert bounds[i].tolist() == [x0, y0, x0 + w, y0 + h]
+
+
+def test_grid_tile_index_zorder():
+    mpp = MPP(1.0, 1.0)
+    kw = dict(
+        image_size=IntSize(400, 300, mpp=mpp),
+        tile_size=IntSize(100, 100, mpp=mpp),
+        overlap=0,
+        target_mpp=mpp,
+    )
+    ti_row = GridTileIndex.from_mask(**kw)
+    ti_z = GridTileIndex.from_mask(**kw, order="zorder")
+    assert len(ti_z) == len(ti_row) == 12
+
+    xy_row = [ti_row[i][0].as_tuple() for i in range(len(ti_row))]
+    xy_z = [ti_z[i][0].as_tuple() for i in range(len(ti_z))]
+    assert set(xy_z) == set(xy_row)
+    assert xy_z[:4] == [(0, 0), (100, 0), (0, 100), (100, 100)]
+
+    with pytest.raises(ValueError):
+        GridTileIndex.from_mask(**kw, order="columnmajor")
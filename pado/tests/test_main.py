@@ -387,6 +387,22 @@ def test_cmd_registry_list_empty(registry):
     assert "No datasets registered" in result.stderr
 
 
+def test_registry_only_written_on_changes(registry, mock_dataset_path):
+    with dataset_registry() as dct:
+        dct["abc"] = mock_dataset_path
+    fn = dct._open(mode="rb").path
+    mtime_ns = os.stat(fn).st_mtime_ns
+
+    with dataset_registry() as dct:
+        assert dct["abc"].urlpath == mock_dataset_path
+    assert os.stat(fn).st_mtime_ns == mtime_ns
+
+    with dataset_registry() as dct:
+        del dct["abc"]
+    with dataset_registry() as dct:
+        assert "abc" not in dct
+
+
 def test_cmd_registry_list_check_readable(registry, mock_dataset_path):
     with dataset_registry() as dct:
         dct["abc"] = mock_dataset_path
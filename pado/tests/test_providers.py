@@ -19,10 +19,14 @@ from pado.annotations import Annotations
 from pado.annotations import AnnotationState
 from pado.annotations import Annotator
 from pado.annotations import AnnotatorType
+from pado.collections import validate_dataframe_index
 from pado.create import create_image_provider
 from pado.dataset import PadoDataset
 from pado.images.ids import ImageId
+from pado.images.providers import FilteredImageProvider
+from pado.images.providers import GroupedImageProvider
 from pado.images.providers import ImageProvider
+from pado.images.providers import LocallyCachedImageProvider
 from pado.images.providers import copy_image
 from pado.images.utils import IntBounds
 from pado.io.files import find_files
@@ -94,6 +98,72 @@ def test_roundtrip_image_provider(image_provider):
     assert list(ip0.values()) == list(ip1.values())
 
 
+def test_image_provider_items(image_provider):
+    items = list(image_provider.items())
+    assert [iid for iid, _ in items] == list(image_provider)
+    for iid, image in items:
+        assert image.to_record() == image_provider[iid].to_record()
+
+
+def test_image_provider_column_accessors(image_provider):
+    images = [image_provider[iid] for iid in image_provider]
+    assert image_provider.urlpaths().tolist() == [i.urlpath for i in images]
+    assert image_provider.dimensions().tolist() == [
+        list(i.dimensions.as_tuple()) for i in images
+    ]
+    assert image_provider.mpps().tolist() == [list(i.mpp.as_tuple()) for i in images]
+
+
+def test_locally_cached_image_provider(tmp_path, image_provider):
+    cache_dir = tmp_path.joinpath("image_cache")
+    ip = LocallyCachedImageProvider(image_provider, cache_storage=str(cache_dir))
+    iid = next(iter(ip))
+
+    image = ip[iid]
+    fs = image.urlpath.fs
+    assert ip[iid].urlpath.fs is fs  # cache not prepended twice
+    with image:
+        assert image.dimensions == image_provider[iid].dimensions
+    assert len(list(cache_dir.iterdir())) > 0
+
+
+def test_image_provider_iter_follows_changes(image_provider):
+    ip = ImageProvider(image_provider)
+    iids = list(ip)
+    assert list(ip) == iids
+
+    del ip[iids[0]]
+    assert list(ip) == iids[1:]
+
+    ip[iids[0]] = image_provider[iids[0]]
+    assert list(ip) == iids[1:] + iids[:1]
+
+
+def test_grouped_image_provider_keys_follow_changes(image_provider):
+    iids = list(image_provider)
+    ip0 = ImageProvider(image_provider)
+    ip1 = ImageProvider({})
+    grouped = GroupedImageProvider(ip0, ip1)
+    assert len(grouped) == 3
+    assert list(grouped) == iids
+
+    del ip0[iids[0]]
+    assert len(grouped) == 2
+    ip1[iids[0]] = image_provider[iids[0]]
+    assert len(grouped) == 3
+    assert set(grouped) == set(iids)
+
+
+def test_filtered_image_provider(image_provider):
+    iids = list(image_provider)
+    ip = FilteredImageProvider(image_provider, valid_keys=iids[1:])
+    assert len(ip) == 2
+    assert list(ip) == iids[1:]
+    assert list(ip.df.index) == [iid.to_str() for iid in iids[1:]]
+    with pytest.raises(KeyError):
+        _ = ip[iids[0]]
+
+
 def test_match_partial_paths_reversed_does_not_instantiate(
     multi_image_folder, image_provider
 ):
@@ -109,6 +179,21 @@ def test_match_partial_paths_reversed_does_not_instantiate(
         assert len(m) == 3
 
 
+def test_match_partial_paths_reversed(tmp_path):
+    current = [
+        os.fspath(tmp_path / "a" / "x" / "1.svs"),
+        os.fspath(tmp_path / "b" / "x" / "1.svs"),
+        os.fspath(tmp_path / "b" / "2.svs"),
+    ]
+    new = [
+        os.fspath(tmp_path / "new" / "a" / "x" / "1.svs"),
+        os.fspath(tmp_path / "new" / "2.svs"),
+        os.fspath(tmp_path / "new" / "3.svs"),
+    ]
+    m = match_partial_paths_reversed(current, new)
+    assert m == [new[0], current[1], new[1]]
+
+
 def test_copy_image(tmp_path, image_provider):
     new_dst = tmp_path.joinpath("new_storage_location")
     iid = next(iter(image_provider))
@@ -233,3 +318,18 @@ def test_provider_rejects_non_image_id_keys(provider_cls, index0):
     with pytest.raises(ValueError) as e:
         _ = provider_cls(df)
     e.match("Detected dataframe indices of type")
+
+
+@pytest.mark.parametrize(
+    "index",
+    [
+        pytest.param([("mock", "a.svs")], id="tuple"),
+        pytest.param([1], id="int"),
+        pytest.param(["a.svs"], id="str"),
+        pytest.param([ImageId("a.svs").to_str(), "b.svs"], id="partial"),
+    ],
+)
+def test_validate_dataframe_index_raises(index):
+    df = pd.DataFrame(index=index, data={"x": [0] * len(index)})
+    with pytest.raises(ValueError):
+        validate_dataframe_index(df)
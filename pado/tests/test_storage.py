@@ -4,6 +4,7 @@ import os.path
 import uuid
 
 import pandas as pd
+import pyarrow as pa
 import pytest
 from pandas.testing import assert_frame_equal
 
@@ -60,6 +61,42 @@ def test_meta_store_roundtrip(parquet_path):
     assert meta == meta2
 
 
+def test_meta_store_metadata_only(parquet_path):
+    df = pd.DataFrame({"A": [1, 2, 3]})
+    store = MetadataProviderStore()
+    store.to_urlpath(df, parquet_path, identifier="test-identifier", abc=1)
+
+    df2, identifier2, meta2 = store.from_urlpath(parquet_path, metadata_only=True)
+    assert df2 is None
+    assert identifier2 == "test-identifier"
+    assert meta2["abc"] == 1
+    assert meta2[MetadataProviderStore.METADATA_KEY_STORE_TYPE] == StoreType.METADATA
+
+
+def test_meta_store_chunked_roundtrip(parquet_path):
+    class _ChunkedStore(MetadataProviderStore):
+        ROW_GROUP_SIZE = 2
+
+    df = pd.DataFrame({"A": [1, 2, 3, 4, 5], "B": ["x", None, None, "y", "z"]})
+    store = _ChunkedStore()
+    store.to_urlpath(df, parquet_path, identifier="test-identifier", abc=1)
+    df2, identifier2, meta2 = store.from_urlpath(parquet_path)
+
+    assert_frame_equal(df, df2)
+    assert identifier2 == "test-identifier"
+    assert meta2["abc"] == 1
+
+
+def test_meta_store_to_urlpath_arrow(parquet_path):
+    df = pd.DataFrame({"A": [1, 2, 3]})
+    store = MetadataProviderStore()
+    store.to_urlpath_arrow(pa.Table.from_pandas(df), parquet_path, identifier="t")
+    df2, identifier2, _ = store.from_urlpath(parquet_path)
+
+    assert_frame_equal(df, df2)
+    assert identifier2 == "t"
+
+
 def test_migration_can_migrate():
     so = StoreInfo(
         StoreType.IMAGE, StoreVersionTuple(0, 0), DataVersionTuple("test", 0)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import sys
+import textwrap
+
+import pytest
+
+import pado.transporter
+from pado.transporter import _parse_rsync_listing
+from pado.transporter import _prefix_listing
+from pado.transporter import list_files_on_remote
+from pado.transporter import main
+
+# emulates `rsync -avz --list-only [--no-recursive --dirs] host:"path" ...`
+_FAKE_RSYNC = """\
+import os
+import sys
+
+args = sys.argv[1:]
+locs = [
+    a.split(":", 1)[1].strip('"')
+    for a in args
+    if ":" in a and " " not in a and not a.startswith("-")
+]
+
+def entry(p, name):
+    d = os.path.isdir(p)
+    print(f"{'d' if d else '-'}rwxr-xr-x {4096 if d else 3:>14} 2020/01/01 00:00:00 {name}")
+
+print("receiving incremental file list")
+for loc in locs:
+    if "--no-recursive" in args and "--dirs" in args:
+        entry(loc, ".")
+        for n in sorted(os.listdir(loc)):
+            entry(os.path.join(loc, n), n)
+    else:
+        parent = os.path.dirname(loc)
+        for root, dirs, files in os.walk(loc):
+            dirs.sort()
+            entry(root, os.path.relpath(root, parent))
+            for f in sorted(files):
+                entry(os.path.join(root, f), os.path.relpath(os.path.join(root, f), parent))
+print("")
+print("sent 1 bytes  received 2 bytes")
+print("total size is 0")
+"""
+
+
+class _CompletedCommand:
+    """canned output of a finished rsync command"""
+
+    def __init__(self, lines, return_code=0, stderr=""):
+        self.lines = lines
+        self.return_code = return_code
+        self.stderr = stderr
+
+    def __iter__(self):
+        return iter(self.lines)
+
+
+def _rsync_line(name, d=False):
+    return b"%srwxr-xr-x %14d 2020/01/01 00:00:00 %s" % (
+        b"d" if d else b"-",
+        4096 if d else 3,
+        name,
+    )
+
+
+def test_parse_rsync_listing():
+    lines = [
+        b"receiving incremental file list",
+        _rsync_line(b"a", d=True),
+        _rsync_line(b"a/file 1.svs"),
+        b"receiving incremental file list",  # repeated for multiple paths
+        _rsync_line(b"b.svs"),
+        b"",
+        b"sent 1 bytes  received 2 bytes",
+        b"total size is 0",
+    ]
+    listing = list(_parse_rsync_listing(_CompletedCommand(lines)))
+    assert listing == [
+        (_rsync_line(b"a", d=True), b"a"),
+        (_rsync_line(b"a/file 1.svs"), b"a/file 1.svs"),
+        (_rsync_line(b"b.svs"), b"b.svs"),
+    ]
+
+
+def test_parse_rsync_listing_errors():
+    with pytest.raises(RuntimeError):
+        list(_parse_rsync_listing(_CompletedCommand([], 23, "failed")))
+    with pytest.raises(RuntimeError):
+        list(_parse_rsync_listing(_CompletedCommand([b"unexpected"])))
+    lines = [b"receiving incremental file list", b"", b"sent", b"total"]
+    with pytest.raises(RuntimeError):
+        list(_parse_rsync_listing(_CompletedCommand(lines, return_code=23)))
+
+
+def test_prefix_listing():
+    listing = [(_rsync_line(b"a/b.svs"), b"a/b.svs")]
+    assert list(_prefix_listing(listing, b"base")) == [
+        (_rsync_line(b"base/a/b.svs"), b"base/a/b.svs")
+    ]
+
+
+@pytest.fixture
+def fake_rsync(tmp_path, monkeypatch):
+    if sys.platform == "win32":
+        pytest.skip("fake rsync executable requires a posix shebang")
+    rsync = tmp_path.joinpath("rsync")
+    rsync.write_text(f"#!{sys.executable}\n{_FAKE_RSYNC}")
+    rsync.chmod(0o755)
+    monkeypatch.setattr(pado.transporter, "RSYNC_EXECUTABLE", str(rsync))
+
+    root = tmp_path.joinpath("remote", "root")
+    for fn in ["top.txt", "data/a.svs", "data/sub/b.svs", "other/c.svs"]:
+        root.joinpath(fn).parent.mkdir(parents=True, exist_ok=True)
+        root.joinpath(fn).write_text("abc")
+    yield root
+
+
+_EXPECTED_LISTING = textwrap.dedent(
+    """\
+    root
+    root/top.txt
+    root/data
+    root/data/a.svs
+    root/data/sub
+    root/data/sub/b.svs
+    root/other
+    root/other/c.svs
+    """
+).encode()
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_list_files_on_remote(fake_rsync, capsysbinary, jobs):
+    list_files_on_remote(str(fake_rsync), target="host", jobs=jobs)
+    assert capsysbinary.readouterr().out == _EXPECTED_LISTING
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_list_files_on_remote_long_and_match(fake_rsync, capsysbinary, jobs):
+    list_files_on_remote(
+        str(fake_rsync), target="host", jobs=jobs, long=True, regex=r"\.svs$"
+    )
+    assert capsysbinary.readouterr().out.splitlines() == [
+        _rsync_line(b"root/data/a.svs"),
+        _rsync_line(b"root/data/sub/b.svs"),
+        _rsync_line(b"root/other/c.svs"),
+    ]
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_cli_ls_multiple_paths(fake_rsync, capsysbinary, jobs):
+    data = str(fake_rsync.joinpath("data"))
+    other = str(fake_rsync.joinpath("other"))
+    argv = ["--root", "--target", "host", "ls", "-r", "-j", jobs, data, other]
+    assert not main(argv)
+    assert capsysbinary.readouterr().out.splitlines() == [
+        b"data",
+        b"data/a.svs",
+        b"data/sub",
+        b"data/sub/b.svs",
+        b"other",
+        b"other/c.svs",
+    ]
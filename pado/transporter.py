@@ -1,16 +1,23 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import functools
+import hashlib
+import itertools
 import json
 import logging
 import os
 import re
+import selectors
 import subprocess
 import sys
+import threading
+import time
 import traceback
 from argparse import ArgumentTypeError
 from collections import defaultdict
+from collections import deque
 from functools import partial
 from pathlib import Path
 from textwrap import dedent
@@ -18,6 +25,14 @@ from textwrap import dedent
 import toml
 from platformdirs import user_config_dir
 
+if sys.version_info >= (3, 11):
+    import tomllib as _toml_reader
+else:
+    try:
+        import tomli as _toml_reader
+    except ImportError:
+        _toml_reader = None
+
 
 def subcommand(*arguments, parent):
     """decorator helper for commandline"""
@@ -88,10 +103,14 @@ def _get_default_config_file():
     return config_file
 
 
+@functools.lru_cache(maxsize=1)
 def _get_default_config():
     config_file = _get_default_config_file()
-    with config_file.open("r") as f:
-        return toml.load(f)
+    if _toml_reader is None:
+        with config_file.open("r") as f:
+            return toml.load(f)
+    with config_file.open("rb") as f:
+        return _toml_reader.load(f)
 
 
 def _set_default_config(obj):
@@ -99,6 +118,7 @@ def _set_default_config(obj):
     config_file.parent.mkdir(parents=True, exist_ok=True)
     with config_file.open("w") as f:
         toml.dump(obj, f)
+    _get_default_config.cache_clear()
 
 
 def _make_ssh_command(remote, *cmd):
@@ -118,8 +138,43 @@ def _make_ssh_command(remote, *cmd):
     return cmd_list
 
 
-def check_ssh_no_password(target, *, tunnel=None):
+# successful ssh probes are cached for this many seconds
+SSH_PROBE_CACHE_TTL = 24 * 60 * 60
+
+
+def _get_ssh_probe_cache_file():
+    return _get_default_config_file().parent / "ssh_probe_cache.json"
+
+
+def _ssh_probe_cache_key(target, tunnel):
+    key = json.dumps([target, tunnel]).encode()
+    return hashlib.blake2b(key, digest_size=16).hexdigest()
+
+
+def _load_ssh_probe_cache():
+    try:
+        with _get_ssh_probe_cache_file().open("r") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    now = time.time()
+    return {k: v for k, v in cache.items() if v.get("expires", 0) > now}
+
+
+def _store_ssh_probe_cache(cache):
+    cache_file = _get_ssh_probe_cache_file()
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    with tmp_file.open("w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_file, cache_file)
+
+
+def check_ssh_no_password(target, *, tunnel=None, use_cache=True):
     """verify if a passwordless remote connection can be established (tunnel optional)"""
+    key = _ssh_probe_cache_key(target, tunnel)
+    if use_cache and key in _load_ssh_probe_cache():
+        return True
 
     cmd = _make_ssh_command(target, "exit")
 
@@ -130,15 +185,22 @@ def check_ssh_no_password(target, *, tunnel=None):
         subprocess.run(cmd, env=os.environ, check=True, capture_output=True)
     except subprocess.CalledProcessError:
         return False
-    else:
-        return True
+
+    if use_cache:
+        cache = _load_ssh_probe_cache()
+        cache[key] = {"ok": True, "expires": time.time() + SSH_PROBE_CACHE_TTL}
+        try:
+            _store_ssh_probe_cache(cache)
+        except OSError:
+            logger.debug("could not store ssh probe cache")
+    return True
 
 
-def cli_check_ssh_no_password(target, tunnel):
-    if check_ssh_no_password(target=target, tunnel=tunnel):
+def cli_check_ssh_no_password(target, tunnel, *, use_cache=True):
+    if check_ssh_no_password(target=target, tunnel=tunnel, use_cache=use_cache):
         print(f"connection to '{target}' established via '{tunnel}'")
 
-    elif check_ssh_no_password(target=tunnel):
+    elif check_ssh_no_password(target=tunnel, use_cache=use_cache):
         msg = dedent(
             """\
             SSH ERROR: Could not access the requested host '{target}' without password via '{tunnel}'
@@ -157,42 +219,94 @@ def cli_check_ssh_no_password(target, tunnel):
         print(msg.format(target=tunnel))
 
 
+def _set_pipe_size(fd, size):
+    """try increasing the pipe buffer, so the child can write ahead (linux only)"""
+    try:
+        import fcntl
+    except ImportError:
+        return
+    # F_SETPIPE_SZ is only exposed by fcntl on Python >= 3.10
+    f_setpipe_sz = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+    try:
+        fcntl.fcntl(fd, f_setpipe_sz, size)
+    except OSError:
+        pass
+
+
 class _CommandIter:
-    """iterate over the stdout of a running subprocess"""
+    """iterate over the stdout lines (bytes) of a running subprocess"""
 
-    def __init__(self, command, poll_timeout=0.5, max_timeout=10.0):
+    def __init__(self, command, poll_timeout=0.5):
         if not isinstance(command, list):
             raise TypeError(f"command expected list, got {type(command).__name__!r}")
         self.command = command
         self.return_code = None
-        self.max_timeout_counter = max(1, int(max_timeout / poll_timeout))
         self.poll_timeout = float(poll_timeout)
         self.stderr = None
 
     def __iter__(self):
         logger.info(f"rsync: {subprocess.list2cmdline(self.command)}")
         process = subprocess.Popen(
-            self.command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=os.environ
+            self.command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=os.environ,
         )
-        process_running = True
+        _set_pipe_size(process.stdout.fileno(), 1 << 20)
+        stderr_chunks = []
+        if sys.platform == "win32":
+            # selectors can't wait on pipes on windows
+            chunks = self._iter_chunks_threaded(process, stderr_chunks)
+        else:
+            chunks = self._iter_chunks_selectors(process, stderr_chunks)
         try:
-            while process_running:
-                output = process.stdout.readline() if process.stdout else b""
-                if output:
-                    yield output.rstrip(b"\n").decode()
-
-                else:
-                    self.return_code = process.poll()
-                    if self.return_code is not None:
-                        break
-        except KeyboardInterrupt:
+            buf = b""
+            for chunk in chunks:
+                # split lines ourselves
+                *lines, buf = (buf + chunk).split(b"\n")
+                yield from lines
+            if buf:
+                yield buf
+            self.return_code = process.wait()
+        except (KeyboardInterrupt, GeneratorExit):
             process.kill()
             raise
         finally:
-            self.stderr = process.stderr.read().decode() if process.stderr else ""
-            logger.debug(self.stderr)
+            chunks.close()
+            self.stderr = b"".join(stderr_chunks).decode(errors="replace")
             process.wait()
 
+    def _iter_chunks_selectors(self, process, stderr_chunks):
+        """yield stdout chunks while draining stderr (POSIX only)"""
+        with selectors.DefaultSelector() as sel:
+            # drain stdout and stderr together so neither pipe can fill up
+            sel.register(process.stdout, selectors.EVENT_READ)
+            sel.register(process.stderr, selectors.EVENT_READ)
+            while sel.get_map():
+                for key, _ in sel.select(timeout=self.poll_timeout):
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        sel.unregister(key.fileobj)
+                    elif key.fileobj is process.stderr:
+                        stderr_chunks.append(chunk)
+                        logger.debug(chunk.decode(errors="replace"))
+                    else:
+                        yield chunk
+
+    @staticmethod
+    def _iter_chunks_threaded(process, stderr_chunks):
+        """yield stdout chunks while a thread drains stderr"""
+
+        def _drain_stderr():
+            for chunk in iter(partial(process.stderr.read1, 65536), b""):
+                stderr_chunks.append(chunk)
+                logger.debug(chunk.decode(errors="replace"))
+
+        thread = threading.Thread(target=_drain_stderr, daemon=True)
+        thread.start()
+        yield from iter(partial(process.stdout.read1, 65536), b"")
+        thread.join()
+
 
 def _make_rsync_cmd(*options, remote_shell=None):
     """creates the command list for running rsync commands"""
@@ -208,6 +322,12 @@ def _make_rsync_cmd(*options, remote_shell=None):
     return cmd
 
 
+# share a single ssh connection between parallel rsync processes
+_SSH_CONTROL_OPTIONS = (
+    "-o ControlMaster=auto -o ControlPath=~/.ssh/cm-%r@%h:%p -o ControlPersist=60s"
+)
+
+
 def _make_remote_shell_option(
     target, local_ssh_cmd=SSH_EXECUTABLE, tunnel_ssh_cmd="ssh"
 ):
@@ -218,39 +338,78 @@ def _make_remote_path(remote, path):
     return f'{remote}:"{os.fspath(path)}"'
 
 
-def list_files_on_remote(
-    path,
-    *,
-    target,
-    tunnel=None,
-    recursive=True,
-    long=False,
-    regex=None,
-    image_id_json=None,
-):
-    """list files on the remote"""
+class _AsyncCommandIter:
+    """iterate over the stdout lines (bytes) of a subprocess in an event loop
 
-    options = ["-avz", "--list-only"]
-    if not recursive:
-        options.append("--no-recursive")
+    the subprocess starts on construction, but only makes progress while
+    the event loop runs, i.e. while iterating over any of its instances.
+    """
 
-    remote_shell = _make_remote_shell_option(tunnel) if tunnel else None
-    remote_location = _make_remote_path(target, path)
+    def __init__(self, command, loop, max_lines=4096):
+        self.command = command
+        self.return_code = None
+        self.stderr = None
+        self._loop = loop
+        self._max_lines = max_lines
+        self._queue = self._task = None
+        loop.run_until_complete(self._start())
 
-    cmd = _make_rsync_cmd(*options, remote_shell=remote_shell)
-    cmd.append(remote_location)
+    async def _start(self):
+        # create the queue within the running loop (python < 3.10)
+        self._queue = asyncio.Queue(maxsize=self._max_lines)
+        self._task = asyncio.ensure_future(self._run())
 
-    if regex is not None:
-        regex = re.compile(regex)
+    async def _run(self):
+        logger.info(f"rsync: {subprocess.list2cmdline(self.command)}")
+        process = stderr = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=os.environ,
+                limit=1 << 20,
+            )
+            # drain stderr concurrently so neither pipe can fill up
+            stderr = asyncio.ensure_future(process.stderr.read())
+            async for line in process.stdout:
+                await self._queue.put(line[:-1] if line.endswith(b"\n") else line)
+            self.stderr = (await stderr).decode(errors="replace")
+            self.return_code = await process.wait()
+        except BaseException as err:
+            if stderr is not None:
+                stderr.cancel()
+            if process is not None and process.returncode is None:
+                process.kill()
+                await process.wait()
+            if isinstance(err, asyncio.CancelledError):
+                raise
+            await self._queue.put(err)
+        else:
+            await self._queue.put(None)
 
-    if image_id_json is not None:
-        _image_id_map = defaultdict(set)
-        for record in image_id_json:
-            iid = tuple(record["image_id"])
-            _image_id_map[len(iid)].add(iid)
-        image_id_json = dict(sorted(_image_id_map.items()))
+    def __iter__(self):
+        while True:
+            item = self._loop.run_until_complete(self._queue.get())
+            if item is None:
+                return
+            elif isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def cancel(self):
+        """kill the subprocess if it is still running"""
+        self._task.cancel()
+        return self._task
 
-    cmd_iter = _CommandIter(cmd)
+
+def _iter_rsync_listing(cmd):
+    """yield (line, filename) tuples of an rsync --list-only command"""
+    return _parse_rsync_listing(_CommandIter(cmd))
+
+
+def _parse_rsync_listing(cmd_iter):
+    """yield (line, filename) bytes tuples from the output of rsync --list-only"""
     it = iter(cmd_iter)
     try:
         line0 = next(it)
@@ -260,31 +419,18 @@ def list_files_on_remote(
             "rsync command failed with return_code:", cmd_iter.return_code
         )
 
-    status_msgs = {"receiving file list ... done", "receiving incremental file list"}
+    status_msgs = {b"receiving file list ... done", b"receiving incremental file list"}
     if line0 not in status_msgs:
         raise RuntimeError(f"received: '{line0!r}'")
     # parse files
     for line in it:
+        if line in status_msgs:
+            continue  # repeated for multiple source paths
         try:
             permission, size, date, mtime, filename = line.split(maxsplit=4)
         except ValueError:
             break  # we reached the end of the file list
-
-        if regex and not regex.search(filename):
-            continue
-
-        if image_id_json:
-            fn_parts = Path(filename).parts
-            for length, image_ids in image_id_json.items():
-                if fn_parts[-length:] in image_ids:
-                    break
-            else:
-                continue
-
-        if long:
-            print(line)
-        else:
-            print(filename)
+        yield line, filename
 
     # parse summary
     _, _ = it  # ignore the two summary lines for now
@@ -295,6 +441,150 @@ def list_files_on_remote(
         )
 
 
+def _prefix_listing(listing, prefix):
+    """prepend a path prefix to the filenames of a rsync listing"""
+    for line, filename in listing:
+        new_filename = prefix + b"/" + filename
+        yield line[: len(line) - len(filename)] + new_filename, new_filename
+
+
+def _iter_rsync_listing_parallel(path, *, target, tunnel, jobs):
+    """recursively list a remote path with one rsync process per subdirectory"""
+    if tunnel:
+        local_ssh_cmd = f"{SSH_EXECUTABLE} {_SSH_CONTROL_OPTIONS}"
+        remote_shell = _make_remote_shell_option(tunnel, local_ssh_cmd=local_ssh_cmd)
+    else:
+        remote_shell = f"{SSH_EXECUTABLE} {_SSH_CONTROL_OPTIONS}"
+    base = os.fsencode(os.path.basename(os.path.normpath(path)))
+
+    # list the top level entries
+    cmd = _make_rsync_cmd(
+        "-avz", "--list-only", "--no-recursive", "--dirs", remote_shell=remote_shell
+    )
+    cmd.append(_make_remote_path(target, os.path.join(path, "")))
+    root_entry = None
+    files = []
+    subdirs = []
+    for line, filename in _iter_rsync_listing(cmd):
+        if filename == b".":
+            root_entry = line[: len(line) - 1] + base, base
+        elif line.startswith(b"d"):
+            subdirs.append(filename)
+        else:
+            files.append((line, filename))
+    if root_entry is not None:
+        yield root_entry
+    yield from _prefix_listing(files, base)
+
+    sub_cmds = []
+    for name in subdirs:
+        sub_cmd = _make_rsync_cmd("-avz", "--list-only", remote_shell=remote_shell)
+        sub_path = os.path.join(path, os.fsdecode(name))
+        sub_cmd.append(_make_remote_path(target, sub_path))
+        sub_cmds.append(sub_cmd)
+
+    # a single event loop multiplexes the pipes of all rsync subprocesses,
+    # at most `jobs` run ahead and their output is streamed in order
+    loop = asyncio.new_event_loop()
+    sub_cmds_iter = iter(sub_cmds)
+    running = deque(
+        _AsyncCommandIter(c, loop) for c in itertools.islice(sub_cmds_iter, jobs)
+    )
+    try:
+        while running:
+            yield from _prefix_listing(_parse_rsync_listing(running[0]), base)
+            running.popleft()
+            for c in itertools.islice(sub_cmds_iter, 1):
+                running.append(_AsyncCommandIter(c, loop))
+    finally:
+        tasks = [c.cancel() for c in running]
+        loop.run_until_complete(_await_all(tasks))
+        loop.close()
+
+
+async def _await_all(tasks):
+    """wait for all tasks to finish, ignoring their exceptions"""
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def list_files_on_remote(
+    path,
+    *,
+    target,
+    tunnel=None,
+    recursive=True,
+    long=False,
+    regex=None,
+    image_id_json=None,
+    jobs=1,
+):
+    """list files on the remote"""
+
+    if regex is not None:
+        # match on the raw rsync output bytes
+        regex = re.compile(os.fsencode(regex))
+
+    if image_id_json is not None:
+        _image_id_map = defaultdict(set)
+        for record in image_id_json:
+            iid = tuple(record["image_id"])
+            _image_id_map[len(iid)].add(iid)
+        image_id_json = dict(sorted(_image_id_map.items()))
+
+    # multiple paths are listed by a single rsync process
+    paths = [path] if isinstance(path, (str, os.PathLike)) else list(path)
+    if not paths:
+        raise ValueError("must provide at least one path")
+
+    if recursive and jobs > 1:
+        listing = itertools.chain.from_iterable(
+            _iter_rsync_listing_parallel(p, target=target, tunnel=tunnel, jobs=jobs)
+            for p in paths
+        )
+    else:
+        options = ["-avz", "--list-only"]
+        if not recursive:
+            options.append("--no-recursive")
+
+        remote_shell = _make_remote_shell_option(tunnel) if tunnel else None
+
+        cmd = _make_rsync_cmd(*options, remote_shell=remote_shell)
+        cmd.extend(_make_remote_path(target, p) for p in paths)
+        listing = _iter_rsync_listing(cmd)
+
+    # keep rsync's output as bytes all the way to stdout
+    stdout_buffer = getattr(sys.stdout, "buffer", None)
+    if stdout_buffer is None:
+
+        def write(data):
+            sys.stdout.write(os.fsdecode(data))
+
+    else:
+        sys.stdout.flush()
+        write = stdout_buffer.write
+
+    # bind to locals, this loop runs once per remote file
+    search = regex.search if regex is not None else None
+    try:
+        for line, filename in listing:
+            if search is not None and not search(filename):
+                continue
+
+            if image_id_json:
+                fn_parts = Path(os.fsdecode(filename)).parts
+                for length, image_ids in image_id_json.items():
+                    if fn_parts[-length:] in image_ids:
+                        break
+                else:
+                    continue
+
+            write((line if long else filename) + b"\n")
+    finally:
+        sys.stdout.flush()
+        if stdout_buffer is not None:
+            stdout_buffer.flush()
+
+
 def _make_path(path, *, base):
     if base is None:
         base = "/"
@@ -420,7 +710,8 @@ def config(args, subparser):
     argument("-l", "--long", action="store_true", help="list details"),
     argument("--match", help="match regex"),
     argument("--select-image-id-json", help="matches defined in json file"),
-    argument("path", help="base directory to start ls"),
+    argument("-j", "--jobs", type=int, default=1, help="parallel rsync processes"),
+    argument("path", nargs="+", help="base directories to start ls"),
 )
 def ls(args, subparser):
     """list files on remote"""
@@ -430,13 +721,14 @@ def ls(args, subparser):
             image_id_json = json.load(f)
 
     list_files_on_remote(
-        path=_make_path(args.path, base=args.base_path),
+        path=[_make_path(p, base=args.base_path) for p in args.path],
         target=args.target,
         tunnel=args.tunnel,
         recursive=args.recursive,
         long=args.long,
         regex=args.match,
         image_id_json=image_id_json,
+        jobs=args.jobs,
     )
 
 